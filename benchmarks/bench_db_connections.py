@@ -0,0 +1,56 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import timeit
+from contextlib import closing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from twitch_db_client import close_connections, db_select  # noqa: E402
+
+_ROWS = 2000
+_RUNS = 500
+_QUERIES = {
+    "full scan": "select ProductIdStr, ProductTitle from DbSet"
+    , "point lookup": "select ProductTitle from DbSet where ProductIdStr = 'product-00000042'"
+}
+
+
+def _create_db(db_path: str) -> None:
+    with closing(sqlite3.connect(db_path)) as db:
+        db.execute("create table DbSet (ProductIdStr text primary key, ProductTitle text)")
+        db.executemany(
+            "insert into DbSet values (?, ?)"
+            , ((f"product-{idx:08}", f"Product title #{idx}") for idx in range(_ROWS))
+        )
+        db.commit()
+
+
+def _connect_per_query(db_path: str, query: str):
+    with closing(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)) as db:
+        with closing(db.cursor()) as cursor:
+            res = cursor.execute(query).fetchall()
+            column_names = [column[0] for column in cursor.description]
+            return [dict(zip(column_names, row)) for row in res]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "GameProductInfo.sqlite")
+        _create_db(db_path)
+
+        print(f"{_RUNS} runs against {_ROWS} rows")
+        for query_name, query in _QUERIES.items():
+            connect_per_query = timeit.timeit(lambda: _connect_per_query(db_path, query), number=_RUNS)
+            pooled = timeit.timeit(lambda: db_select(db_path, query), number=_RUNS)
+            print(
+                f"{query_name:>14}: connect-per-query {connect_per_query * 1000 / _RUNS:.3f} ms"
+                f", pooled {pooled * 1000 / _RUNS:.3f} ms"
+            )
+
+        close_connections()
+
+
+if __name__ == "__main__":
+    main()
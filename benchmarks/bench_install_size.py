@@ -0,0 +1,65 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from twitch_install_size import InstallSizeCalculator  # noqa: E402
+
+_DIRECTORIES = 1000
+_FILES_PER_DIRECTORY = 100
+
+
+def _create_tree(root):
+    for dir_idx in range(_DIRECTORIES):
+        directory = os.path.join(root, f"Data {dir_idx % 10}", f"Chunk {dir_idx}")
+        os.makedirs(directory)
+        for file_idx in range(_FILES_PER_DIRECTORY):
+            with open(os.path.join(directory, f"asset-{file_idx}.pak"), "wb") as f:
+                f.write(b"\0" * (file_idx + 1))
+
+
+def _os_walk(root):
+    return sum(
+        os.path.getsize(os.path.join(path, name))
+        for path, _, names in os.walk(root)
+        for name in names
+    )
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as root:
+        _create_tree(root)
+        calculator = InstallSizeCalculator()
+        try:
+            expected, walk_elapsed = _timed(lambda: _os_walk(root))
+            cold, cold_elapsed = _timed(lambda: calculator.walk(root))
+            warm, warm_elapsed = _timed(lambda: calculator.walk(root))
+
+            with open(os.path.join(root, "Data 0", "Chunk 0", "patch.pak"), "wb") as f:
+                f.write(b"\0" * 1024)
+            patched, patched_elapsed = _timed(lambda: calculator.walk(root))
+        finally:
+            calculator.close()
+
+    assert expected == cold == warm == patched - 1024
+
+    print(f"{_DIRECTORIES} directories, {_DIRECTORIES * _FILES_PER_DIRECTORY} files")
+    for name, elapsed in (
+        ("os.walk + getsize", walk_elapsed)
+        , ("cold walk", cold_elapsed)
+        , ("warm walk", warm_elapsed)
+        , ("one directory changed", patched_elapsed)
+    ):
+        print(f"{name:>24}: {elapsed * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import os
+import sys
+import timeit
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from twitch_launcher_client import TwitchLauncherClient  # noqa: E402
+from twitch_registry import HKEY_CURRENT_USER, HKEY_LOCAL_MACHINE, MemoryRegistry  # noqa: E402
+
+_ENTRIES = 5000
+_RUNS = 20
+_INSTALL_PATH = "C:\\Program Files (x86)\\Twitch"
+
+
+def _registry(with_launcher):
+    registry = MemoryRegistry()
+    for root in (HKEY_CURRENT_USER, HKEY_LOCAL_MACHINE):
+        for idx in range(_ENTRIES):
+            registry.set_values(
+                root
+                , f"{TwitchLauncherClient._UNINSTALL_KEY}\\{{{idx:08x}-app}}"
+                , {"DisplayName": f"App {idx}", "InstallLocation": f"C:\\Apps\\{idx}"}
+            )
+    if with_launcher:
+        registry.set_values(
+            HKEY_LOCAL_MACHINE
+            , f"{TwitchLauncherClient._UNINSTALL_KEY}\\{{{_ENTRIES:08x}-twitch}}"
+            , {"DisplayName": "Twitch", "InstallLocation": _INSTALL_PATH}
+        )
+    return registry
+
+
+def _lookup(client):
+    client._launcher_install_path = None
+    client.update_install_path()
+
+
+def main():
+    results = {}
+    with mock.patch("os.path.exists", side_effect=lambda path: path == _INSTALL_PATH):
+        installed = _registry(with_launcher=True)
+        client = TwitchLauncherClient(registry=installed)
+        results["installed, full enumeration"] = timeit.timeit(
+            lambda: (setattr(client, "_location", None), client._find_location()), number=_RUNS
+        )
+
+        client._location = client._find_location()
+        results["installed, cached location"] = timeit.timeit(lambda: _lookup(client), number=_RUNS)
+
+        missing = TwitchLauncherClient(registry=_registry(with_launcher=False))
+        results["missing, lookup"] = timeit.timeit(
+            lambda: (setattr(missing, "_next_lookup", 0.0), _lookup(missing)), number=_RUNS
+        )
+        results["missing, backed off"] = timeit.timeit(lambda: _lookup(missing), number=_RUNS)
+
+    print(f"{2 * _ENTRIES} uninstall entries, {_RUNS} runs")
+    for name, elapsed in results.items():
+        print(f"{name:>30}: {elapsed * 1000 / _RUNS:.3f} ms/lookup")
+
+
+if __name__ == "__main__":
+    main()
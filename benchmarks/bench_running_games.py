@@ -0,0 +1,75 @@
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from twitch_path_index import PathPrefixIndex  # noqa: E402
+
+_PROCESSES = 2000
+_GAMES = 1000
+_RUNS = 20
+
+
+def _install_paths():
+    return {
+        f"game-{idx}": f"D:\\Games\\Twitch\\Publisher {idx % 50}\\Game {idx}"
+        for idx in range(_GAMES)
+    }
+
+
+def _process_paths(install_paths):
+    rnd = random.Random(42)
+    system = [
+        f"C:\\Windows\\System32\\service-{idx}\\svchost-{idx}.exe"
+        for idx in range(_PROCESSES - 20)
+    ]
+    games = [f"{path}\\Binaries\\Win64\\game.exe" for path in rnd.sample(list(install_paths.values()), 20)]
+    return system + games
+
+
+def _prefix_scan(install_paths, process_paths):
+    def is_game_running(game_install_path) -> bool:
+        for process_path in process_paths:
+            if process_path.startswith(game_install_path):
+                return True
+        return False
+
+    return {game_id for game_id, install_path in install_paths.items() if is_game_running(install_path)}
+
+
+def _build_index(install_paths):
+    return PathPrefixIndex((install_path, game_id) for game_id, install_path in install_paths.items())
+
+
+def _indexed_lookup(index, process_paths):
+    running_games = set()
+    for process_path in process_paths:
+        running_games.update(index.match(process_path))
+    return running_games
+
+
+def _indexed(install_paths, process_paths):
+    return _indexed_lookup(_build_index(install_paths), process_paths)
+
+
+def main():
+    install_paths = _install_paths()
+    process_paths = _process_paths(install_paths)
+    index = _build_index(install_paths)
+    assert _prefix_scan(install_paths, process_paths) == _indexed(install_paths, process_paths)
+
+    results = {
+        "prefix scan": timeit.timeit(lambda: _prefix_scan(install_paths, process_paths), number=_RUNS)
+        , "index build + lookup": timeit.timeit(lambda: _indexed(install_paths, process_paths), number=_RUNS)
+        , "lookup (prebuilt index)": timeit.timeit(lambda: _indexed_lookup(index, process_paths), number=_RUNS)
+    }
+
+    print(f"{_PROCESSES} processes, {_GAMES} installed games, {_RUNS} runs")
+    for name, elapsed in results.items():
+        print(f"{name:>24}: {elapsed * 1000 / _RUNS:.3f} ms/scan")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict
+
+
+@dataclass
+class _OpenCircuit:
+    failures: int
+    retry_at: float
+
+
+class CircuitBreaker:
+    def __init__(
+        self
+        , min_backoff: float = 5.0
+        , max_backoff: float = 300.0
+        , clock: Callable[[], float] = time.monotonic
+    ):
+        self._min_backoff = min_backoff
+        self._max_backoff = max_backoff
+        self._clock = clock
+        self._open: Dict[str, _OpenCircuit] = {}
+
+    def allow(self, resource: str) -> bool:
+        circuit = self._open.get(resource)
+        return circuit is None or self._clock() >= circuit.retry_at
+
+    def failed(self, resource: str, reason: str) -> None:
+        circuit = self._open.get(resource)
+        failures = 1 if circuit is None else circuit.failures + 1
+        backoff = min(self._min_backoff * 2 ** (failures - 1), self._max_backoff)
+        self._open[resource] = _OpenCircuit(failures=failures, retry_at=self._clock() + backoff)
+
+        if circuit is None:
+            logging.warning(f"{resource!r} is unavailable ({reason}), probing it with a backoff until it shows up")
+        else:
+            logging.debug(f"{resource!r} is still unavailable, next probe in {backoff:g}s")
+
+    def succeeded(self, resource: str) -> None:
+        if self._open.pop(resource, None) is not None:
+            logging.info(f"{resource!r} is available again")
+
+    def reset(self, resource: str) -> None:
+        circuit = self._open.get(resource)
+        if circuit is not None:
+            circuit.retry_at = self._clock()
@@ -1,18 +1,115 @@
 import logging
 import os
+import random
 import sqlite3
+import threading
+import time
+from collections import namedtuple
 from contextlib import contextmanager
-from typing import Dict, List, Optional
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
+from twitch_stats import stats
 
-@contextmanager
-def _db_connect(db_path: str):
-    db = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+_MMAP_SIZE = 64 * 1024 * 1024
+_BUSY_TIMEOUT_MS = 250
+_LOCK_RETRIES = 3
+_LOCK_RETRY_DELAY = 0.05
+_SQLITE_BUSY = 5
+_SQLITE_LOCKED = 6
+_CACHE_SIZE_KB = 8 * 1024
+
+
+def _db_open(db_path: str) -> sqlite3.Connection:
+    db = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
     try:
-        yield db
+        db.execute(f"pragma busy_timeout = {_BUSY_TIMEOUT_MS}")
+        db.execute("pragma query_only = 1")
+        db.execute(f"pragma mmap_size = {_MMAP_SIZE}")
+        db.execute(f"pragma cache_size = -{_CACHE_SIZE_KB}")
+        return db
 
-    finally:
+    except Exception:
         db.close()
+        raise
+
+
+def _stat(path: str) -> Optional[os.stat_result]:
+    try:
+        return os.stat(path)
+    except (OSError, ValueError):
+        return None
+
+
+def _file_id(path: str) -> Optional[Tuple[int, int]]:
+    stat = _stat(path)
+    return (stat.st_dev, stat.st_ino) if stat else None
+
+
+def _file_stat(path: str) -> Optional[Tuple[int, int]]:
+    stat = _stat(path)
+    return (stat.st_mtime_ns, stat.st_size) if stat else None
+
+
+@dataclass
+class _PooledConnection:
+    db: sqlite3.Connection
+    file_id: Optional[Tuple[int, int]]
+    lock: threading.Lock
+
+
+class DbConnectionPool:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._connections: Dict[str, _PooledConnection] = {}
+
+    def _acquire(self, db_path: str) -> _PooledConnection:
+        file_id = _file_id(db_path)
+        with self._lock:
+            pooled = self._connections.get(db_path)
+            if pooled is not None and pooled.file_id == file_id:
+                return pooled
+
+            if pooled is not None:
+                logging.debug(f"DB {db_path} was replaced or deleted, reopening")
+                self._close(db_path)
+
+            with stats.phase("db_open"):
+                pooled = _PooledConnection(db=_db_open(db_path), file_id=file_id, lock=threading.Lock())
+            self._connections[db_path] = pooled
+            return pooled
+
+    def _close(self, db_path: str) -> None:
+        pooled = self._connections.pop(db_path, None)
+        if pooled is not None:
+            with pooled.lock:
+                pooled.db.close()
+
+    @contextmanager
+    def connection(self, db_path: str):
+        pooled = self._acquire(db_path)
+        with pooled.lock:
+            yield pooled.db
+
+    def discard(self, db_path: str) -> None:
+        with self._lock:
+            self._close(db_path)
+
+    def close(self) -> None:
+        with self._lock:
+            for db_path in list(self._connections.keys()):
+                self._close(db_path)
+
+
+_pool = DbConnectionPool()
+
+
+def close_connections() -> None:
+    _pool.close()
+
+
+def is_db_locked(error: BaseException) -> bool:
+    return isinstance(error, sqlite3.OperationalError) and "locked" in str(error)
 
 
 @contextmanager
@@ -25,24 +122,238 @@ def _db_cursor(db):
         cursor.close()
 
 
-def db_select(db_path: str, query: str) -> Optional[List[Dict]]:
+RowFactory = Callable[[sqlite3.Cursor], Optional[Callable[[Tuple], Any]]]
+
+_FETCH_BATCH_SIZE = 256
+
+
+def tuple_rows(cursor: sqlite3.Cursor) -> None:
+    return None
+
+
+def dict_rows(cursor: sqlite3.Cursor) -> Callable[[Tuple], Dict[str, Any]]:
+    column_names = [column[0] for column in cursor.description]
+    return lambda row: dict(zip(column_names, row))
+
+
+def namedtuple_rows(cursor: sqlite3.Cursor) -> Callable[[Tuple], Tuple]:
+    return namedtuple("Row", [column[0] for column in cursor.description], rename=True)._make
+
+
+def sqlite_rows(cursor: sqlite3.Cursor) -> Callable[[Tuple], sqlite3.Row]:
+    return lambda row: sqlite3.Row(cursor, row)
+
+
+def db_iter(
+    db_path: str
+    , query: str
+    , params: Sequence = ()
+    , row_factory: RowFactory = tuple_rows
+    , batch_size: int = _FETCH_BATCH_SIZE
+) -> Iterator:
     if not os.path.exists(db_path):
         raise FileNotFoundError(f"DB {db_path} does not exists")
 
-    with _db_connect(db_path=db_path) as db:
+    for attempt in range(_LOCK_RETRIES + 1):
+        rows_read = False
+        try:
+            for rows in _db_batches(db_path, query, params, row_factory, batch_size):
+                rows_read = True
+                yield from rows
+            return
+
+        except sqlite3.OperationalError as error:
+            # rows already handed out can't be taken back, so only a read that hasn't started is retried
+            if rows_read or not is_db_locked(error):
+                raise
+
+            stats.count("db_locked")
+            if attempt == _LOCK_RETRIES:
+                raise
+
+            time.sleep(_LOCK_RETRY_DELAY * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+
+def _db_batches(
+    db_path: str
+    , query: str
+    , params: Sequence
+    , row_factory: RowFactory
+    , batch_size: int
+) -> Iterator[Iterable]:
+    with _pool.connection(db_path=db_path) as db:
         with _db_cursor(db=db) as cursor:
-            res = cursor.execute(query).fetchall()
-            column_names = [column[0] for column in cursor.description]
-            return [dict(zip(column_names, row)) for row in res]
+            with stats.phase("db_query"):
+                res = cursor.execute(query, params)
 
+            make_row = row_factory(cursor)
+            while True:
+                with stats.phase("db_rows"):
+                    rows = res.fetchmany(batch_size)
+                if not rows:
+                    return
 
-def get_cookie(db_cookies_path: str, cookie_name: str) -> Optional[str]:
+                stats.count("rows_read", len(rows))
+                yield rows if make_row is None else map(make_row, rows)
+
+
+def db_select(db_path: str, query: str) -> Optional[List[Dict]]:
+    return list(db_iter(db_path=db_path, query=query, row_factory=dict_rows))
+
+
+def get_cookies(db_cookies_path: str, cookie_names: Sequence[str]) -> Optional[Dict[str, str]]:
     try:
-        return db_select(
+        return dict(db_iter(
             db_path=db_cookies_path
-            , query=f"select value from cookies where name='{cookie_name}';"
-        )[0]["value"]
+            , query=f"select name, value from cookies where name in ({', '.join('?' * len(cookie_names))})"
+            , params=tuple(cookie_names)
+        ))
 
     except Exception:
-        logging.exception(f"Failed to get a cookie: '{cookie_name}'")
+        logging.exception(f"Failed to get cookies: {cookie_names}")
         return None
+
+
+def get_cookie(db_cookies_path: str, cookie_name: str) -> Optional[str]:
+    cookies = get_cookies(db_cookies_path, [cookie_name])
+    return cookies.get(cookie_name) if cookies else None
+
+
+@dataclass(frozen=True)
+class DbFingerprint:
+    db_stat: Tuple[int, int]
+    wal_stat: Optional[Tuple[int, int]]
+    data_version: Optional[int]
+
+
+class DbChangeTracker:
+    def __init__(self, pool: Optional[DbConnectionPool] = None):
+        self._pool = pool or _pool
+        self._fingerprints: Dict[str, DbFingerprint] = {}
+
+    def _data_version(self, db_path: str) -> Optional[int]:
+        try:
+            with self._pool.connection(db_path) as db:
+                return db.execute("pragma data_version").fetchone()[0]
+
+        except sqlite3.Error:
+            logging.debug(f"Failed to get data version of {db_path}")
+            self._pool.discard(db_path)
+            return None
+
+    def fingerprint(self, db_path: str) -> Optional[DbFingerprint]:
+        db_stat = _file_stat(db_path)
+        if db_stat is None:
+            return None
+
+        return DbFingerprint(
+            db_stat=db_stat
+            , wal_stat=_file_stat(f"{db_path}-wal")
+            , data_version=self._data_version(db_path)
+        )
+
+    def has_changed(self, db_path: str) -> bool:
+        fingerprint = self.fingerprint(db_path)
+        if fingerprint is not None and fingerprint == self._fingerprints.get(db_path):
+            return False
+
+        if fingerprint is None:
+            self._fingerprints.pop(db_path, None)
+        else:
+            self._fingerprints[db_path] = fingerprint
+        return True
+
+    def invalidate(self, db_path: str) -> None:
+        self._fingerprints.pop(db_path, None)
+
+    def close(self) -> None:
+        self._fingerprints.clear()
+
+
+@dataclass
+class TableDelta:
+    upserted: List[Tuple]
+    removed: List[Any]
+    complete: bool = False
+
+
+class DbMirror:
+    _BACKUP_PAGES = 1024
+    _BACKUP_RETRY_SLEEP = 0.05
+
+    def __init__(self, projection: str, pool: Optional[DbConnectionPool] = None, busy_timeout: float = 1.0):
+        self._projection = projection
+        self._busy_timeout = busy_timeout
+        self._pool = pool or _pool
+        self._control = sqlite3.connect("file::memory:", uri=True, check_same_thread=False)
+        self._generation = 0
+        self._snapshot: Optional[sqlite3.Connection] = None
+        self._snapshot_uri: Optional[str] = None
+
+    def _diff(self, snapshot_uri: str) -> TableDelta:
+        current = self._projection.format(schema="cur")
+        self._control.execute("attach database ? as cur", (snapshot_uri,))
+        try:
+            if self._snapshot_uri is None:
+                return TableDelta(upserted=self._control.execute(current).fetchall(), removed=[], complete=True)
+
+            previous = self._projection.format(schema="prev")
+            self._control.execute("attach database ? as prev", (self._snapshot_uri,))
+            try:
+                return TableDelta(
+                    upserted=self._control.execute(f"{current} except {previous}").fetchall()
+                    , removed=[
+                        row[0]
+                        for row in self._control.execute(
+                            f"select id from ({previous}) except select id from ({current})"
+                        )
+                    ]
+                )
+            finally:
+                self._control.execute("detach database prev")
+        finally:
+            self._control.execute("detach database cur")
+
+    def _backup(self, db: sqlite3.Connection, snapshot: sqlite3.Connection) -> None:
+        deadline = time.monotonic() + self._busy_timeout
+
+        # sqlite3 retries busy/locked backup steps forever, the progress callback is the only way to give up
+        def progress(status: int, remaining: int, total: int) -> None:
+            if status in (_SQLITE_BUSY, _SQLITE_LOCKED) and time.monotonic() > deadline:
+                raise sqlite3.OperationalError("database is locked")
+
+        db.backup(snapshot, pages=self._BACKUP_PAGES, progress=progress, sleep=self._BACKUP_RETRY_SLEEP)
+
+    def refresh(self, db_path: str) -> TableDelta:
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(f"DB {db_path} does not exists")
+
+        snapshot_uri = f"file:twitch-mirror-{id(self)}-{self._generation + 1}?mode=memory&cache=shared"
+        snapshot = sqlite3.connect(snapshot_uri, uri=True, check_same_thread=False)
+        try:
+            with self._pool.connection(db_path) as db:
+                with stats.phase("db_backup"):
+                    self._backup(db, snapshot)
+
+            with stats.phase("db_diff"):
+                delta = self._diff(snapshot_uri)
+
+        except Exception:
+            snapshot.close()
+            raise
+
+        stats.count("rows_read", len(delta.upserted) + len(delta.removed))
+        if self._snapshot is not None:
+            self._snapshot.close()
+        self._snapshot, self._snapshot_uri = snapshot, snapshot_uri
+        self._generation += 1
+        return delta
+
+    def reset(self) -> None:
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot, self._snapshot_uri = None, None
+
+    def close(self) -> None:
+        self.reset()
+        self._control.close()
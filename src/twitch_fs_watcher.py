@@ -0,0 +1,355 @@
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+
+def is_windows() -> bool:
+    return sys.platform == "win32"
+
+
+def is_linux() -> bool:
+    return sys.platform.startswith("linux")
+
+
+class FsWatcher(ABC):
+    def __init__(self, directories: Iterable[str]):
+        self._directories = list(directories)
+
+    # blocks up to timeout seconds and returns paths of the changed entries,
+    # or the watched directory itself when its changes could not be tracked per entry
+    @abstractmethod
+    def read_events(self, timeout: float) -> List[str]:
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
+
+
+class PollingFsWatcher(FsWatcher):
+    def __init__(self, directories: Iterable[str]):
+        super().__init__(directories)
+        self._closed = threading.Event()
+        self._entries = {directory: self._scan(directory) for directory in self._directories}
+
+    @staticmethod
+    def _scan(directory: str) -> Dict[str, Tuple[int, int]]:
+        entries = {}
+        try:
+            with os.scandir(directory) as dir_entries:
+                for entry in dir_entries:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        entries[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            pass
+
+        return entries
+
+    def read_events(self, timeout: float) -> List[str]:
+        if self._closed.wait(timeout):
+            return []
+
+        changed = []
+        for directory in self._directories:
+            entries = self._scan(directory)
+            previous_entries = self._entries[directory]
+            changed.extend(
+                path
+                for path in entries.keys() | previous_entries.keys()
+                if entries.get(path) != previous_entries.get(path)
+            )
+            self._entries[directory] = entries
+
+        return changed
+
+    def close(self) -> None:
+        self._closed.set()
+
+
+if is_linux():
+    import ctypes
+    import ctypes.util
+
+    _IN_MODIFY = 0x00000002
+    _IN_ATTRIB = 0x00000004
+    _IN_CLOSE_WRITE = 0x00000008
+    _IN_MOVED_FROM = 0x00000040
+    _IN_MOVED_TO = 0x00000080
+    _IN_CREATE = 0x00000100
+    _IN_DELETE = 0x00000200
+    _IN_Q_OVERFLOW = 0x00004000
+    _IN_WATCH_MASK = _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+
+    _INOTIFY_EVENT = struct.Struct("iIII")
+    _INOTIFY_BUFFER_SIZE = 64 * 1024
+
+    class InotifyFsWatcher(FsWatcher):
+        def __init__(self, directories: Iterable[str]):
+            super().__init__(directories)
+            self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if self._fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+            self._watches: Dict[int, str] = {}
+            try:
+                for directory in self._directories:
+                    wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _IN_WATCH_MASK)
+                    if wd < 0:
+                        errno = ctypes.get_errno()
+                        raise OSError(errno, f"Failed to watch {directory}: {os.strerror(errno)}")
+                    self._watches[wd] = directory
+
+            except Exception:
+                os.close(self._fd)
+                raise
+
+        def read_events(self, timeout: float) -> List[str]:
+            readable, _, _ = select.select([self._fd], [], [], timeout)
+            if not readable:
+                return []
+
+            try:
+                data = os.read(self._fd, _INOTIFY_BUFFER_SIZE)
+            except BlockingIOError:
+                return []
+
+            changed = []
+            offset = 0
+            while offset + _INOTIFY_EVENT.size <= len(data):
+                wd, mask, _, name_len = _INOTIFY_EVENT.unpack_from(data, offset)
+                offset += _INOTIFY_EVENT.size
+                name = data[offset:offset + name_len].rstrip(b"\0")
+                offset += name_len
+
+                if mask & _IN_Q_OVERFLOW:
+                    changed.extend(self._directories)
+                elif wd in self._watches:
+                    directory = self._watches[wd]
+                    changed.append(os.path.join(directory, os.fsdecode(name)) if name else directory)
+
+            return changed
+
+        def close(self) -> None:
+            if self._fd >= 0:
+                os.close(self._fd)
+                self._fd = -1
+
+
+if is_windows():
+    import ctypes
+    from ctypes import wintypes
+
+    _FILE_LIST_DIRECTORY = 0x0001
+    _FILE_SHARE_ALL = 0x00000007
+    _OPEN_EXISTING = 3
+    _FILE_FLAG_BACKUP_SEMANTICS = 0x02000000
+    _FILE_FLAG_OVERLAPPED = 0x40000000
+    _FILE_NOTIFY_CHANGE_FILE_NAME = 0x00000001
+    _FILE_NOTIFY_CHANGE_SIZE = 0x00000008
+    _FILE_NOTIFY_CHANGE_LAST_WRITE = 0x00000010
+    _NOTIFY_FILTER = _FILE_NOTIFY_CHANGE_FILE_NAME | _FILE_NOTIFY_CHANGE_SIZE | _FILE_NOTIFY_CHANGE_LAST_WRITE
+    _WAIT_OBJECT_0 = 0x00000000
+    _WAIT_TIMEOUT = 0x00000102
+    _INVALID_HANDLE_VALUE = wintypes.HANDLE(-1).value
+    _NOTIFY_BUFFER_SIZE = 64 * 1024
+    _FILE_NOTIFY_INFORMATION = struct.Struct("III")
+
+    class _OVERLAPPED(ctypes.Structure):
+        _fields_ = [
+            ("Internal", ctypes.c_size_t)
+            , ("InternalHigh", ctypes.c_size_t)
+            , ("Offset", wintypes.DWORD)
+            , ("OffsetHigh", wintypes.DWORD)
+            , ("hEvent", wintypes.HANDLE)
+        ]
+
+    _kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    _kernel32.CreateFileW.restype = wintypes.HANDLE
+    _kernel32.CreateFileW.argtypes = [
+        wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, wintypes.LPVOID, wintypes.DWORD, wintypes.DWORD
+        , wintypes.HANDLE
+    ]
+    _kernel32.CreateEventW.restype = wintypes.HANDLE
+    _kernel32.CreateEventW.argtypes = [wintypes.LPVOID, wintypes.BOOL, wintypes.BOOL, wintypes.LPCWSTR]
+    _kernel32.ReadDirectoryChangesW.argtypes = [
+        wintypes.HANDLE, wintypes.LPVOID, wintypes.DWORD, wintypes.BOOL, wintypes.DWORD
+        , ctypes.POINTER(wintypes.DWORD), ctypes.POINTER(_OVERLAPPED), wintypes.LPVOID
+    ]
+    _kernel32.GetOverlappedResult.argtypes = [
+        wintypes.HANDLE, ctypes.POINTER(_OVERLAPPED), ctypes.POINTER(wintypes.DWORD), wintypes.BOOL
+    ]
+    _kernel32.WaitForMultipleObjects.argtypes = [
+        wintypes.DWORD, ctypes.POINTER(wintypes.HANDLE), wintypes.BOOL, wintypes.DWORD
+    ]
+    _kernel32.ResetEvent.argtypes = [wintypes.HANDLE]
+    _kernel32.CancelIoEx.argtypes = [wintypes.HANDLE, ctypes.POINTER(_OVERLAPPED)]
+    _kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+
+    class _DirectoryHandle:
+        def __init__(self, directory: str):
+            self.directory = directory
+            self.handle = _kernel32.CreateFileW(
+                directory, _FILE_LIST_DIRECTORY, _FILE_SHARE_ALL, None, _OPEN_EXISTING
+                , _FILE_FLAG_BACKUP_SEMANTICS | _FILE_FLAG_OVERLAPPED, None
+            )
+            if self.handle == _INVALID_HANDLE_VALUE:
+                raise ctypes.WinError(ctypes.get_last_error())
+
+            self.event = _kernel32.CreateEventW(None, True, False, None)
+            self.overlapped = _OVERLAPPED(hEvent=self.event)
+            self.buffer = ctypes.create_string_buffer(_NOTIFY_BUFFER_SIZE)
+            self.read()
+
+        def read(self) -> None:
+            _kernel32.ResetEvent(self.event)
+            if not _kernel32.ReadDirectoryChangesW(
+                self.handle, self.buffer, len(self.buffer), False, _NOTIFY_FILTER, None
+                , ctypes.byref(self.overlapped), None
+            ):
+                raise ctypes.WinError(ctypes.get_last_error())
+
+        def changes(self) -> List[str]:
+            transferred = wintypes.DWORD()
+            if not _kernel32.GetOverlappedResult(
+                self.handle, ctypes.byref(self.overlapped), ctypes.byref(transferred), False
+            ):
+                raise ctypes.WinError(ctypes.get_last_error())
+
+            # an empty result means the buffer overflowed and the changes were dropped
+            if not transferred.value:
+                return [self.directory]
+
+            changed = []
+            data = self.buffer.raw[:transferred.value]
+            offset = 0
+            while True:
+                next_offset, _, name_len = _FILE_NOTIFY_INFORMATION.unpack_from(data, offset)
+                name_offset = offset + _FILE_NOTIFY_INFORMATION.size
+                changed.append(
+                    os.path.join(self.directory, data[name_offset:name_offset + name_len].decode("utf-16-le"))
+                )
+                if not next_offset:
+                    return changed
+                offset += next_offset
+
+        def close(self) -> None:
+            _kernel32.CancelIoEx(self.handle, ctypes.byref(self.overlapped))
+            _kernel32.CloseHandle(self.handle)
+            _kernel32.CloseHandle(self.event)
+
+    class ReadDirectoryChangesFsWatcher(FsWatcher):
+        def __init__(self, directories: Iterable[str]):
+            super().__init__(directories)
+            self._handles: List[_DirectoryHandle] = []
+            try:
+                for directory in self._directories:
+                    self._handles.append(_DirectoryHandle(directory))
+            except Exception:
+                self.close()
+                raise
+
+            self._events = (wintypes.HANDLE * len(self._handles))(*(handle.event for handle in self._handles))
+
+        def read_events(self, timeout: float) -> List[str]:
+            result = _kernel32.WaitForMultipleObjects(len(self._handles), self._events, False, int(timeout * 1000))
+            if result == _WAIT_TIMEOUT:
+                return []
+
+            idx = result - _WAIT_OBJECT_0
+            if not 0 <= idx < len(self._handles):
+                raise ctypes.WinError(ctypes.get_last_error())
+
+            handle = self._handles[idx]
+            changed = handle.changes()
+            handle.read()
+            return changed
+
+        def close(self) -> None:
+            for handle in self._handles:
+                handle.close()
+            self._handles = []
+
+
+def create_fs_watcher(directories: Iterable[str]) -> FsWatcher:
+    directories = list(directories)
+    try:
+        if is_linux():
+            return InotifyFsWatcher(directories)
+        if is_windows():
+            return ReadDirectoryChangesFsWatcher(directories)
+
+    except OSError:
+        logging.warning("Failed to watch %s, falling back to polling", directories, exc_info=True)
+
+    return PollingFsWatcher(directories)
+
+
+class FsWatchService:
+    _IDLE_TIMEOUT = 1.0
+
+    def __init__(
+        self
+        , targets: Dict[str, str]
+        , on_change: Callable[[Set[str]], None]
+        , debounce: float = 0.5
+        , max_delay: float = 5.0
+        , watcher_factory: Callable[[Iterable[str]], FsWatcher] = create_fs_watcher
+    ):
+        self._targets = {os.path.normcase(path): key for path, key in targets.items()}
+        self._directories = {os.path.dirname(path) for path in self._targets.keys()}
+        self._on_change = on_change
+        self._debounce = debounce
+        self._max_delay = max_delay
+        self._watcher = watcher_factory(sorted(self._directories))
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="twitch-fs-watcher", daemon=True)
+
+    def _keys(self, paths: Iterable[str]) -> Set[str]:
+        keys = set()
+        for path in map(os.path.normcase, paths):
+            for target, key in self._targets.items():
+                # sqlite writes go to the db itself and its -wal/-journal/-shm siblings
+                if path.startswith(target) or path == os.path.dirname(target):
+                    keys.add(key)
+        return keys
+
+    def _run(self) -> None:
+        pending: Set[str] = set()
+        first_event = last_event = 0.0
+        try:
+            while not self._stopped.is_set():
+                keys = self._keys(self._watcher.read_events(self._debounce if pending else self._IDLE_TIMEOUT))
+                now = time.monotonic()
+                if keys:
+                    if not pending:
+                        first_event = now
+                    pending |= keys
+                    last_event = now
+
+                if self._stopped.is_set():
+                    break
+
+                if pending and (now - last_event >= self._debounce or now - first_event >= self._max_delay):
+                    self._on_change(pending)
+                    pending = set()
+
+        except Exception:
+            logging.exception("Filesystem watcher failed")
+        finally:
+            self._watcher.close()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, wait: bool = True) -> None:
+        self._stopped.set()
+        if wait and self._thread.is_alive():
+            self._thread.join(timeout=self._IDLE_TIMEOUT * 2)
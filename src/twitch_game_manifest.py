@@ -0,0 +1,79 @@
+import json
+import logging
+import os
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from twitch_path_index import path_key, PathPrefixIndex
+
+_FUEL_MANIFEST = "fuel.json"
+
+
+def manifest_executables(install_path: str, manifest: Dict) -> FrozenSet[str]:
+    command = manifest.get("Main", {}).get("Command")
+    if not isinstance(command, str) or not command:
+        raise ValueError("manifest declares no main command")
+
+    return frozenset([path_key(os.path.join(install_path, command))])
+
+
+class GameExecutableIndex:
+    def __init__(self, executables: Dict[str, List[str]], install_paths: PathPrefixIndex[str]):
+        self._executables = executables
+        self._install_paths = install_paths
+
+    def match(self, binary_path: str) -> List[str]:
+        game_ids = self._executables.get(path_key(binary_path))
+        if game_ids is not None:
+            return game_ids
+
+        # games without a usable manifest are still matched by their install directory
+        return self._install_paths.match(binary_path)
+
+
+class GameManifestCache:
+    def __init__(self):
+        self._manifests: Dict[str, Tuple[int, Optional[FrozenSet[str]]]] = {}
+
+    def _read(self, manifest_path: str, install_path: str) -> Optional[FrozenSet[str]]:
+        try:
+            with open(manifest_path, encoding="utf-8-sig") as manifest:
+                return manifest_executables(install_path, json.load(manifest))
+
+        except (OSError, ValueError, AttributeError) as error:
+            logging.warning(f"Ignoring game manifest {manifest_path}: {error!r}")
+            return None
+
+    def executables(self, install_path: str) -> Optional[FrozenSet[str]]:
+        manifest_path = os.path.join(install_path, _FUEL_MANIFEST)
+        try:
+            mtime = os.stat(manifest_path).st_mtime_ns
+        except OSError:
+            self._manifests.pop(install_path, None)
+            return None
+
+        cached = self._manifests.get(install_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        executables = self._read(manifest_path, install_path)
+        self._manifests[install_path] = (mtime, executables)
+        return executables
+
+    def index(self, install_paths: Iterable[Tuple[str, str]]) -> GameExecutableIndex:
+        executables: Dict[str, List[str]] = {}
+        fallback: PathPrefixIndex[str] = PathPrefixIndex()
+        indexed = set()
+        for install_path, game_id in install_paths:
+            indexed.add(install_path)
+            game_executables = self.executables(install_path)
+            if game_executables is None:
+                fallback.add(install_path, game_id)
+                continue
+
+            for executable in game_executables:
+                executables.setdefault(executable, []).append(game_id)
+
+        for install_path in self._manifests.keys() - indexed:
+            del self._manifests[install_path]
+
+        return GameExecutableIndex(executables, fallback)
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+_CACHE_VERSION = 1
+
+
+@dataclass(frozen=True)
+class _DirectorySize:
+    mtime_ns: int
+    files_size: int
+    subdirs: Tuple[str, ...]
+
+
+def _scan_directory(path: str, mtime_ns: int) -> _DirectorySize:
+    files_size = 0
+    subdirs = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    files_size += entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                continue
+
+    return _DirectorySize(mtime_ns=mtime_ns, files_size=files_size, subdirs=tuple(subdirs))
+
+
+class InstallSizeCalculator:
+    def __init__(self, cache_path: Optional[str] = None, max_workers: int = 2):
+        self._cache_path = cache_path
+        self._directories: Dict[str, _DirectorySize] = {}
+        self._visited: Set[str] = set()
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="twitch-size")
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not self._cache_path:
+                return
+
+            try:
+                with open(self._cache_path, encoding="utf-8") as cache_file:
+                    cache = json.load(cache_file)
+
+                if cache.get("version") != _CACHE_VERSION:
+                    logging.info(f"Ignoring install size cache {self._cache_path} of version {cache.get('version')}")
+                    return
+
+                self._directories = {
+                    path: _DirectorySize(mtime_ns=mtime_ns, files_size=files_size, subdirs=tuple(subdirs))
+                    for path, mtime_ns, files_size, subdirs in cache["directories"]
+                }
+
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, KeyError, TypeError, AttributeError):
+                logging.exception(f"Failed to load install size cache {self._cache_path}")
+
+    def save(self) -> None:
+        if not self._cache_path:
+            return
+
+        # directories no walk has reached this time belong to games that are gone
+        directories = [
+            [path, directory.mtime_ns, directory.files_size, directory.subdirs]
+            for path, directory in list(self._directories.items())
+            if path in self._visited
+        ]
+        if not self._dirty and len(directories) == len(self._directories):
+            return
+
+        for path in self._directories.keys() - self._visited:
+            self._directories.pop(path, None)
+        self._dirty = False
+
+        tmp_path = f"{self._cache_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self._cache_path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as cache_file:
+                json.dump({"version": _CACHE_VERSION, "directories": directories}, cache_file, separators=(",", ":"))
+            os.replace(tmp_path, self._cache_path)
+
+        except OSError:
+            logging.exception(f"Failed to save install size cache {self._cache_path}")
+
+    def _evict(self, path: str) -> None:
+        directory = self._directories.pop(path, None)
+        for subdir in directory.subdirs if directory else ():
+            self._evict(subdir)
+
+    def walk(self, path: str) -> int:
+        self._load()
+        total_size = 0
+        pending: List[str] = [path]
+        while pending:
+            directory_path = pending.pop()
+            try:
+                mtime_ns = os.stat(directory_path).st_mtime_ns
+                directory = self._directories.get(directory_path)
+                if directory is None or directory.mtime_ns != mtime_ns:
+                    directory = _scan_directory(directory_path, mtime_ns)
+                    self._directories[directory_path] = directory
+                    self._dirty = True
+
+            except OSError:
+                self._evict(directory_path)
+                self._dirty = True
+                continue
+
+            self._visited.add(directory_path)
+
+            total_size += directory.files_size
+            pending.extend(directory.subdirs)
+
+        return total_size
+
+    async def get_size(self, path: str) -> Optional[int]:
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, self.walk, path)
+        except Exception:
+            logging.exception(f"Failed to get size of {path}")
+            return None
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
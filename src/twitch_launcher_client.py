@@ -1,11 +1,18 @@
 import asyncio
+import json
 import logging
 import os
 import subprocess
 import sys
+import time
 import webbrowser
-from typing import List, Optional, TypeVar
-from galaxy.proc_tools import process_iter
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Iterator, List, Optional, Tuple, TypeVar
+
+from galaxy.api.errors import UnknownError
+
+from twitch_processes import ProcessSnapshot
+from twitch_registry import default_registry, HKEY_CURRENT_USER, HKEY_LOCAL_MACHINE, Registry
 
 
 def is_windows() -> bool:
@@ -13,7 +20,6 @@ def is_windows() -> bool:
 
 
 if is_windows():
-    import winreg
     import ctypes
 
 T = TypeVar("T")
@@ -23,18 +29,39 @@ def os_specific(unknown, win: Optional[T] = None, mac: Optional[T] = None) -> Op
     return {"win32": win, "darwin": mac}.get(sys.platform, unknown)
 
 
+class LauncherNotReadyError(UnknownError):
+    def __init__(self, timeout: float):
+        super().__init__(f"Twitch launcher did not become ready in {timeout:g}s")
+
+
+@dataclass(frozen=True)
+class LauncherLocation:
+    root: str
+    subkey: str
+    install_path: str
+
+
 class TwitchLauncherClient:
     _LAUNCHER_DISPLAY_NAME = "Twitch"
+    _LAUNCHER_AGENT_EXE = "TwitchAgent.exe"
+    _UNINSTALL_KEY = r"Software\Microsoft\Windows\CurrentVersion\Uninstall"
+    _REGISTRY_ROOTS = (HKEY_CURRENT_USER, HKEY_LOCAL_MACHINE)
+    _LOOKUP_BACKOFF_MIN = 5.0
+    _LOOKUP_BACKOFF_MAX = 300.0
+    _READY_TIMEOUT = 30.0
+    _PROCESS_SNAPSHOT_MAX_AGE = 0.25
+    _READY_POLL_MIN = 0.05
+    _READY_POLL_MAX = 1.0
 
     def _find_launcher_window(self) -> Optional[str]:
         return ctypes.windll.user32.FindWindowW(None, self._LAUNCHER_DISPLAY_NAME) or None
 
-    @property
-    def _is_launcher_agent_running(self) -> bool:
-        for proc_info in process_iter():
-            if proc_info.binary_path and proc_info.binary_path.endswith("TwitchAgent.exe"):
-                return True
-        return False
+    async def _is_launcher_agent_running(self) -> bool:
+        # a process scan is too slow for the event loop, and may also have to wait for a refresh's scan to finish
+        await asyncio.get_running_loop().run_in_executor(
+            None, self._processes.update, self._PROCESS_SNAPSHOT_MAX_AGE
+        )
+        return self._processes.is_running(self._LAUNCHER_AGENT_EXE)
 
     @property
     def _is_launcher_running(self) -> bool:
@@ -51,32 +78,63 @@ class TwitchLauncherClient:
 
         return False
 
-    def _get_launcher_install_path(self) -> Optional[str]:
-        if is_windows():
+    def _check_location(self, root: str, subkey: str) -> Optional[LauncherLocation]:
+        values = self._registry.values(root, f"{self._UNINSTALL_KEY}\\{subkey}")
+        if not values or values.get("DisplayName") != self._LAUNCHER_DISPLAY_NAME:
+            return None
 
+        install_path = values.get("InstallLocation")
+        if not install_path or not os.path.exists(str(install_path)):
+            return None
+
+        return LauncherLocation(root=root, subkey=subkey, install_path=str(install_path))
+
+    def _location_candidates(self) -> Iterator[Tuple[str, str]]:
+        if self._location is not None:
+            yield self._location.root, self._location.subkey
+
+        for root in self._REGISTRY_ROOTS:
+            yield root, self._LAUNCHER_DISPLAY_NAME
+
+        for root in self._REGISTRY_ROOTS:
             try:
-                for h_root in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
-                    with winreg.OpenKey(h_root, r"Software\Microsoft\Windows\CurrentVersion\Uninstall") as h_apps:
-                        for idx in range(winreg.QueryInfoKey(h_apps)[0]):
-                            try:
-                                with winreg.OpenKeyEx(h_apps, winreg.EnumKey(h_apps, idx)) as h_app_info:
-                                    def get_value(key):
-                                        return winreg.QueryValueEx(h_app_info, key)[0]
-
-                                    if get_value("DisplayName") == self._LAUNCHER_DISPLAY_NAME:
-                                        installer_path = get_value("InstallLocation")
-                                        if os.path.exists(str(installer_path)):
-                                            return installer_path
-
-                            except (WindowsError, KeyError, ValueError):
-                                continue
-
-            except (WindowsError, KeyError, ValueError):
-                logging.exception("Failed to get client install location")
-                return None
-        else:
+                for subkey in self._registry.subkeys(root, self._UNINSTALL_KEY):
+                    yield root, subkey
+
+            except OSError:
+                continue
+
+    def _find_location(self) -> Optional[LauncherLocation]:
+        if self._registry is None:
+            return None
+
+        try:
+            for root, subkey in self._location_candidates():
+                location = self._check_location(root, subkey)
+                if location is not None:
+                    return location
+
+        except (OSError, KeyError, ValueError):
+            logging.exception("Failed to get client install location")
+
+        return None
+
+    def _get_launcher_install_path(self) -> Optional[str]:
+        now = self._clock()
+        if now < self._next_lookup:
             return None
 
+        location = self._find_location()
+        if location is None:
+            self._next_lookup = now + self._lookup_backoff
+            self._lookup_backoff = min(self._lookup_backoff * 2, self._LOOKUP_BACKOFF_MAX)
+            return None
+
+        self._location = location
+        self._next_lookup = 0.0
+        self._lookup_backoff = self._LOOKUP_BACKOFF_MIN
+        return location.install_path
+
     @property
     def _launcher_path(self) -> Optional[str]:
         if not self._launcher_install_path:
@@ -105,8 +163,19 @@ class TwitchLauncherClient:
             , shell=True
         )
 
-    def __init__(self):
+    def __init__(
+        self
+        , processes: Optional[ProcessSnapshot] = None
+        , registry: Optional[Registry] = None
+        , clock: Callable[[], float] = time.monotonic
+    ):
+        self._registry = registry or default_registry()
+        self._clock = clock
+        self._location: Optional[LauncherLocation] = None
+        self._next_lookup = 0.0
+        self._lookup_backoff = self._LOOKUP_BACKOFF_MIN
         self._launcher_install_path: Optional[str] = None
+        self._processes = processes or ProcessSnapshot()
 
     @property
     def is_installed(self) -> bool:
@@ -119,17 +188,61 @@ class TwitchLauncherClient:
 
         return os.path.join(self._launcher_install_path, "Electron3", "Cookies")
 
+    @property
+    def location_cache(self) -> Optional[str]:
+        return json.dumps(asdict(self._location)) if self._location is not None else None
+
+    def restore_location_cache(self, location_cache: Optional[str]) -> None:
+        if not location_cache:
+            return
+
+        try:
+            self._location = LauncherLocation(**json.loads(location_cache))
+        except (ValueError, TypeError):
+            logging.warning(f"Ignoring invalid launcher location cache: {location_cache!r}")
+
     def update_install_path(self) -> None:
         if not self._launcher_install_path or not os.path.exists(self._launcher_install_path):
             self._launcher_install_path = self._get_launcher_install_path()
 
+    def _cookies_stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.cookies_db_path)
+            return stat.st_mtime_ns, stat.st_size
+        except (OSError, TypeError):
+            return None
+
+    async def _is_window_ready(self) -> bool:
+        if not self._is_launcher_running:
+            return False
+
+        self._hide_launcher()
+        return True
+
+    async def _is_ready_for_games(self, cookies_stat: Optional[Tuple[int, int]], agent_was_running: bool) -> bool:
+        # only a change counts, an agent left running from an earlier session says nothing about this start
+        return await self._is_window_ready() and (
+            self._cookies_stat() != cookies_stat or (not agent_was_running and await self._is_launcher_agent_running())
+        )
+
+    async def _wait_until(self, is_ready: Callable[[], Awaitable[bool]]) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._READY_TIMEOUT
+        delay = self._READY_POLL_MIN
+        while not await is_ready():
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise LauncherNotReadyError(self._READY_TIMEOUT)
+
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, self._READY_POLL_MAX)
+
     async def start_launcher(self) -> None:
         if self._is_launcher_running:
             return
 
         self._exec(self._launcher_path, cwd=self._launcher_install_path)
-        while not self._hide_launcher():
-            await asyncio.sleep(0.1)
+        await self._wait_until(self._is_window_ready)
 
     def quit_launcher(self) -> None:
         if not self._is_launcher_running:
@@ -139,9 +252,11 @@ class TwitchLauncherClient:
 
     async def launch_game(self, game_id: str) -> None:
         if not self._is_launcher_running:
-            await self.start_launcher()
-            # even after launcher is started, we still have to wait some time, otherwise it ignores game launch commands
-            await asyncio.sleep(3)
+            cookies_stat = self._cookies_stat()
+            agent_was_running = await self._is_launcher_agent_running()
+            self._exec(self._launcher_path, cwd=self._launcher_install_path)
+            # launcher ignores game launch commands until it's fully started, not just when its window shows up
+            await self._wait_until(lambda: self._is_ready_for_games(cookies_stat, agent_was_running))
 
         webbrowser.open_new_tab(f"twitch://fuel-launch/{game_id}")
 
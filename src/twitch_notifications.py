@@ -0,0 +1,104 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from galaxy.api.consts import LocalGameState
+from galaxy.api.plugin import Plugin
+from galaxy.api.types import Game, LocalGame
+
+from twitch_stats import stats
+
+_ADD = "add"
+_REMOVE = "remove"
+_UPDATE = "update"
+
+# (pending operation, new operation) -> collapsed operation, None drops the notification altogether
+_COLLAPSED_OPERATIONS = {
+    (_ADD, _ADD): _ADD
+    , (_ADD, _UPDATE): _ADD
+    , (_ADD, _REMOVE): None
+    , (_UPDATE, _ADD): _UPDATE
+    , (_UPDATE, _UPDATE): _UPDATE
+    , (_UPDATE, _REMOVE): _REMOVE
+    , (_REMOVE, _ADD): _UPDATE
+    , (_REMOVE, _UPDATE): _UPDATE
+    , (_REMOVE, _REMOVE): _REMOVE
+}
+
+
+class NotificationQueue:
+    def __init__(self, plugin: Plugin, drain: Callable[[], Awaitable[None]], batch_size: int = 100):
+        self._plugin = plugin
+        self._drain = drain
+        self._batch_size = batch_size
+        self._games: Dict[str, Tuple[str, Optional[Game]]] = {}
+        # game id -> (state known to galaxy, latest state)
+        self._local_games: Dict[str, Tuple[LocalGameState, LocalGameState]] = {}
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+    def __len__(self) -> int:
+        return len(self._games) + len(self._local_games)
+
+    def _push_game(self, game_id: str, operation: str, game: Optional[Game]) -> None:
+        pending = self._games.pop(game_id, None)
+        if pending is not None:
+            operation = _COLLAPSED_OPERATIONS[(pending[0], operation)]
+            stats.count("notifications_collapsed")
+            if operation is None:
+                return
+
+        self._games[game_id] = (operation, game)
+
+    def add_game(self, game: Game) -> None:
+        self._push_game(game.game_id, _ADD, game)
+
+    def remove_game(self, game_id: str) -> None:
+        self._push_game(game_id, _REMOVE, None)
+
+    def update_game(self, game: Game) -> None:
+        self._push_game(game.game_id, _UPDATE, game)
+
+    def update_local_game_status(self, local_game: LocalGame, previous_state: LocalGameState) -> None:
+        pending = self._local_games.get(local_game.game_id)
+        if pending is not None:
+            previous_state = pending[0]
+            stats.count("notifications_collapsed")
+
+        self._local_games[local_game.game_id] = (previous_state, local_game.local_game_state)
+
+    def _notifications(self):
+        for game_id, (operation, game) in self._games.items():
+            if operation == _ADD:
+                yield self._plugin.add_game, game
+            elif operation == _UPDATE:
+                yield self._plugin.update_game, game
+            else:
+                yield self._plugin.remove_game, game_id
+
+        for game_id, (previous_state, local_game_state) in self._local_games.items():
+            if previous_state != local_game_state:
+                yield self._plugin.update_local_game_status, LocalGame(game_id, local_game_state)
+
+    async def flush(self) -> None:
+        # drain() must not be awaited concurrently, flushes from different tasks take turns
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            await self._flush()
+
+    async def _flush(self) -> None:
+        if not self:
+            return
+
+        stats.gauge("notification_queue_depth", len(self))
+        with stats.phase("notify"):
+            notifications = list(self._notifications())
+            self._games.clear()
+            self._local_games.clear()
+
+            for idx in range(0, len(notifications), self._batch_size):
+                for send, params in notifications[idx:idx + self._batch_size]:
+                    send(params)
+                await self._drain()
+
+        stats.count("notifications_sent", len(notifications))
@@ -0,0 +1,52 @@
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from dataclasses import dataclass
+from typing import Callable, Dict, Generic, Optional, Set, TypeVar
+
+from twitch_stats import stats
+
+T = TypeVar("T")
+
+
+@dataclass
+class PendingRead(Generic[T]):
+    name: str
+    future: "Future[T]"
+    deadline: float
+
+
+class ParallelReader:
+    def __init__(self, max_workers: int = 3, timeout: float = 10.0, clock: Callable[[], float] = time.monotonic):
+        self._timeout = timeout
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="twitch-read")
+        self._running: Dict[str, Future] = {}
+        self._timed_out: Set[str] = set()
+
+    def submit(self, name: str, read: Callable[[], T]) -> PendingRead[T]:
+        future = self._running.get(name)
+        # a read that outlived its timeout is either still in flight or has a result nobody used yet,
+        # in both cases it's picked up instead of piling up another one or losing what it read
+        if future is None or (future.done() and name not in self._timed_out):
+            future = self._executor.submit(read)
+            self._running[name] = future
+        self._timed_out.discard(name)
+
+        return PendingRead(name=name, future=future, deadline=self._clock() + self._timeout)
+
+    def result(self, pending: PendingRead[T]) -> Optional[T]:
+        try:
+            return pending.future.result(timeout=max(0.0, pending.deadline - self._clock()))
+
+        except TimeoutError:
+            logging.warning(f"Reading {pending.name} timed out")
+            self._timed_out.add(pending.name)
+            stats.count("read_timeouts")
+            return None
+        except Exception:
+            logging.exception(f"Failed to read {pending.name}")
+            return None
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,128 @@
+import logging
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+Clock = Callable[[], float]
+
+
+@dataclass
+class _Entry:
+    exists: bool
+    expires: float
+
+
+@dataclass(frozen=True)
+class VolumeTtl:
+    positive: float
+    negative: float
+
+
+def _volume(path: str) -> str:
+    return os.path.splitdrive(path)[0]
+
+
+def _probe(volume: str, paths: List[str]) -> Tuple[Dict[str, bool], float]:
+    started = time.perf_counter()
+
+    # an unplugged drive makes every path on it missing, no need to look any further
+    if volume and not os.path.exists(os.path.join(volume, os.sep)):
+        return {path: False for path in paths}, time.perf_counter() - started
+
+    by_parent: Dict[str, List[str]] = defaultdict(list)
+    for path in paths:
+        by_parent[os.path.dirname(os.path.normpath(path))].append(path)
+
+    result = {}
+    for parent, children in by_parent.items():
+        if len(children) == 1:
+            result[children[0]] = os.path.exists(children[0])
+            continue
+
+        try:
+            with os.scandir(parent) as entries:
+                names = {os.path.normcase(entry.name) for entry in entries}
+        except OSError:
+            # an unlistable parent says nothing about its children, check them one by one
+            for path in children:
+                result[path] = os.path.exists(path)
+            continue
+
+        for path in children:
+            result[path] = os.path.normcase(os.path.basename(os.path.normpath(path))) in names
+
+    return result, time.perf_counter() - started
+
+
+class PathExistenceCache:
+    _FAST_VOLUME_TTL = VolumeTtl(positive=10, negative=30)
+    _SLOW_VOLUME_TTL = VolumeTtl(positive=60, negative=300)
+    _SLOW_PROBE = 0.5
+
+    def __init__(self, timeout: float = 2.0, max_workers: int = 4, clock: Clock = time.monotonic):
+        self._timeout = timeout
+        self._clock = clock
+        self._entries: Dict[str, _Entry] = {}
+        self._slow_volumes: Set[str] = set()
+        self._probes: Dict[str, Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="twitch-stat")
+
+    def _ttl(self, volume: str) -> VolumeTtl:
+        return self._SLOW_VOLUME_TTL if volume in self._slow_volumes else self._FAST_VOLUME_TTL
+
+    def _store(self, volume: str, probe: Future) -> None:
+        try:
+            result, elapsed = probe.result()
+        except Exception:
+            logging.exception(f"Failed to check paths on volume '{volume}'")
+            return
+
+        if elapsed > self._SLOW_PROBE:
+            self._slow_volumes.add(volume)
+        else:
+            self._slow_volumes.discard(volume)
+
+        ttl = self._ttl(volume)
+        now = self._clock()
+        for path, exists in result.items():
+            self._entries[path] = _Entry(exists=exists, expires=now + (ttl.positive if exists else ttl.negative))
+
+    def _known(self, path: str) -> bool:
+        entry = self._entries.get(path)
+        # never probed yet, trust the db that the game is installed
+        return entry.exists if entry else True
+
+    def exists(self, paths: Iterable[str]) -> Dict[str, bool]:
+        paths = list(paths)
+        now = self._clock()
+        stale: Dict[str, List[str]] = defaultdict(list)
+        for path in paths:
+            entry = self._entries.get(path)
+            if entry is None or entry.expires <= now:
+                stale[_volume(path)].append(path)
+
+        submitted = []
+        for volume, volume_paths in stale.items():
+            # a probe still stuck on a dead mount is neither repeated nor waited for until it returns
+            if volume not in self._probes:
+                self._probes[volume] = self._executor.submit(_probe, volume, volume_paths)
+                submitted.append(self._probes[volume])
+
+        if submitted:
+            wait(submitted, timeout=self._timeout)
+
+        for volume, probe in list(self._probes.items()):
+            if probe.done():
+                del self._probes[volume]
+                self._store(volume, probe)
+            else:
+                self._slow_volumes.add(volume)
+
+        # paths on a volume that did not answer in time keep their last known state
+        return {path: self._known(path) for path in paths}
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
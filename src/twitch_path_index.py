@@ -0,0 +1,52 @@
+import posixpath
+from typing import Dict, Generic, Iterable, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def path_parts(path: str) -> List[str]:
+    return [
+        part
+        for part in posixpath.normpath(path.replace("\\", "/")).casefold().split("/")
+        if part and part != "."
+    ]
+
+
+class _Node(Generic[T]):
+    __slots__ = ("children", "values")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node[T]"] = {}
+        self.values: List[T] = []
+
+
+class PathPrefixIndex(Generic[T]):
+    def __init__(self, paths: Iterable[Tuple[str, T]] = ()):
+        self._root: _Node[T] = _Node()
+        for path, value in paths:
+            self.add(path, value)
+
+    def add(self, path: str, value: T) -> None:
+        parts = path_parts(path)
+        if not parts:
+            return
+
+        node = self._root
+        for part in parts:
+            node = node.children.setdefault(part, _Node())
+        node.values.append(value)
+
+    def match(self, path: str) -> List[T]:
+        matches: List[T] = []
+        node = self._root
+        for part in path_parts(path):
+            node = node.children.get(part)
+            if node is None:
+                break
+            matches.extend(node.values)
+
+        return matches
+
+
+def path_key(path: str) -> str:
+    return "/".join(path_parts(path))
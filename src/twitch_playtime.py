@@ -0,0 +1,162 @@
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, IO, Iterable, Optional
+
+from galaxy.api.types import GameTime
+
+_START = "start"
+_STOP = "stop"
+_TOTAL = "total"
+
+
+@dataclass
+class _PlayedTime:
+    time_played: float = 0.0
+    last_played: Optional[float] = None
+
+
+class PlaytimeTracker:
+    def __init__(
+        self
+        , log_path: Optional[str]
+        , compact_threshold: int = 1000
+        , clock: Callable[[], float] = time.time
+    ):
+        self._log_path = log_path
+        self._compact_threshold = compact_threshold
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._played: Dict[str, _PlayedTime] = {}
+        self._sessions: Dict[str, float] = {}
+        self._log: Optional[IO[str]] = None
+        self._log_records = 0
+
+    def _apply(self, record: Dict) -> None:
+        game_id = record["game_id"]
+        event = record["event"]
+        if event == _TOTAL:
+            self._played[game_id] = _PlayedTime(record["time_played"], record["last_played"])
+        elif event == _START:
+            self._sessions[game_id] = record["time"]
+        elif event == _STOP:
+            started = self._sessions.pop(game_id, None)
+            if started is not None:
+                played = self._played.setdefault(game_id, _PlayedTime())
+                played.time_played += max(0.0, record["time"] - started)
+                played.last_played = record["time"]
+
+    def load(self) -> None:
+        if not self._log_path:
+            return
+
+        with self._lock:
+            try:
+                with open(self._log_path, encoding="utf-8") as log:
+                    for line in log:
+                        try:
+                            self._apply(json.loads(line))
+                            self._log_records += 1
+                        except (ValueError, KeyError, TypeError):
+                            logging.warning(f"Skipping malformed playtime record: {line!r}")
+
+            except FileNotFoundError:
+                pass
+            except OSError:
+                logging.exception(f"Failed to read playtime log {self._log_path}")
+
+            if self._sessions:
+                logging.info(f"Dropping {len(self._sessions)} playtime sessions interrupted by a crash")
+                self._sessions.clear()
+
+    def _append(self, record: Dict) -> None:
+        self._apply(record)
+        if not self._log_path:
+            return
+
+        try:
+            if self._log is None:
+                os.makedirs(os.path.dirname(self._log_path), exist_ok=True)
+                self._log = open(self._log_path, "a", encoding="utf-8")
+            self._log.write(json.dumps(record) + "\n")
+            self._log.flush()
+            self._log_records += 1
+
+        except OSError:
+            logging.exception(f"Failed to write playtime log {self._log_path}")
+
+    def update(self, running_games: Iterable[str]) -> None:
+        now = self._clock()
+        running_games = set(running_games)
+        with self._lock:
+            for game_id in [game_id for game_id in self._sessions if game_id not in running_games]:
+                self._append({"event": _STOP, "game_id": game_id, "time": now})
+            for game_id in running_games.difference(self._sessions):
+                self._append({"event": _START, "game_id": game_id, "time": now})
+
+    def game_time(self, game_id: str, now: Optional[float] = None) -> GameTime:
+        played = self._played.get(game_id)
+        time_played = played.time_played if played else 0.0
+        last_played = played.last_played if played else None
+
+        started = self._sessions.get(game_id)
+        if started is not None:
+            now = self._clock() if now is None else now
+            time_played += max(0.0, now - started)
+            last_played = now
+
+        return GameTime(
+            game_id=game_id
+            , time_played=int(time_played // 60)
+            , last_played_time=None if last_played is None else int(last_played)
+        )
+
+    @property
+    def needs_compaction(self) -> bool:
+        return bool(self._log_path) and self._log_records > self._compact_threshold
+
+    def compact(self) -> None:
+        if not self._log_path:
+            return
+
+        with self._lock:
+            records = [
+                {
+                    "event": _TOTAL
+                    , "game_id": game_id
+                    , "time_played": played.time_played
+                    , "last_played": played.last_played
+                }
+                for game_id, played in self._played.items()
+            ]
+            records.extend(
+                {"event": _START, "game_id": game_id, "time": started}
+                for game_id, started in self._sessions.items()
+            )
+
+            tmp_path = f"{self._log_path}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self._log_path), exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as log:
+                    log.writelines(json.dumps(record) + "\n" for record in records)
+                    log.flush()
+                    os.fsync(log.fileno())
+
+                if self._log is not None:
+                    self._log.close()
+                    self._log = None
+                os.replace(tmp_path, self._log_path)
+                self._log_records = len(records)
+
+            except OSError:
+                logging.exception(f"Failed to compact playtime log {self._log_path}")
+
+    def close(self) -> None:
+        self.update(())
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
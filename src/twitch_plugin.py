@@ -1,20 +1,39 @@
+import asyncio
 import json
 import logging
 import os
 import sys
+import time
 import webbrowser
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple, TypeVar, Union
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, TypeVar, Union
 from urllib import parse
 
 from galaxy.api.consts import LocalGameState, OSCompatibility, Platform
 from galaxy.api.errors import InvalidCredentials
 from galaxy.api.plugin import create_and_run_plugin, Plugin
-from galaxy.api.types import Authentication, Game, LicenseInfo, LicenseType, LocalGame, NextStep
-from galaxy.proc_tools import process_iter
-
-from twitch_db_client import db_select, get_cookie
-from twitch_launcher_client import TwitchLauncherClient
+from galaxy.api.types import Authentication, Game, GameTime, LicenseInfo, LicenseType, LocalGame, NextStep
+from galaxy.proc_tools import ProcessId
+
+from twitch_circuit_breaker import CircuitBreaker
+from twitch_db_client import (
+    close_connections, db_iter, DbChangeTracker, DbFingerprint, DbMirror, get_cookies, is_db_locked, TableDelta
+)
+from twitch_fs_watcher import FsWatchService
+from twitch_game_manifest import GameExecutableIndex, GameManifestCache
+from twitch_install_size import InstallSizeCalculator
+from twitch_notifications import NotificationQueue
+from twitch_parallel import ParallelReader
+from twitch_launcher_client import LauncherNotReadyError, TwitchLauncherClient
+from twitch_path_cache import PathExistenceCache
+from twitch_path_index import PathPrefixIndex
+from twitch_playtime import PlaytimeTracker
+from twitch_process_watcher import create_exit_watcher, ProcessExitWatcher
+from twitch_processes import ProcessSnapshot
+from twitch_scheduler import RefreshSchedule
+from twitch_snapshot import GamesSnapshot, load_snapshot, save_snapshot
+from twitch_stats import stats
 
 
 def is_windows() -> bool:
@@ -23,17 +42,58 @@ def is_windows() -> bool:
 
 T = TypeVar("T")
 
+_DB_MIRROR_ENV = "TWITCH_PLUGIN_DB_MIRROR"
+_OWNED_GAMES_PROJECTION = "select ProductIdStr as id, ProductTitle as title from {schema}.DbSet"
+_INSTALLED_GAMES_PROJECTION = (
+    "select Id as id, InstallDirectory as install_directory from {schema}.DbSet"
+    " where Installed and InstallDirectory is not null and InstallDirectory != ''"
+)
+
 
 def os_specific(unknown, win: Optional[T] = None, mac: Optional[T] = None) -> Optional[T]:
     return {"win32": win, "darwin": mac}.get(sys.platform, unknown)
 
 
+def plugin_data_dir() -> Optional[str]:
+    return os_specific(
+        win=os.path.expandvars(r"%LOCALAPPDATA%\GOG.com\Galaxy\plugins\data\twitch")
+        , mac=os.path.expanduser("~/Library/Application Support/GOG.com/Galaxy/plugins/data/twitch")
+        , unknown=None
+    )
+
+
+def reuse_if_unchanged(cached: Dict[str, T], fresh: Dict[str, T]) -> Dict[str, T]:
+    if fresh.keys() == cached.keys() and all(game is cached[game_id] for game_id, game in fresh.items()):
+        return cached
+    return fresh
+
+
+def apply_delta(cached: Dict[str, T], delta: TableDelta, make: Callable[..., T]) -> Dict[str, T]:
+    if delta.complete:
+        return reuse_if_unchanged(cached, {row[0]: make(*row) for row in delta.upserted})
+
+    if not delta.upserted and not delta.removed:
+        return cached
+
+    updated = dict(cached)
+    for game_id in delta.removed:
+        updated.pop(game_id, None)
+    for row in delta.upserted:
+        updated[row[0]] = make(*row)
+    return updated
+
+
 @dataclass
 class InstalledGame(LocalGame):
     install_path: str
 
 
 class TwitchPlugin(Plugin):
+    _OWNED_GAMES = "owned_games"
+    _LOCAL_GAMES = "local_games"
+    _PROCESSES = "processes"
+    _LAUNCHER_LOCATION = "launcher_location"
+    _USER_INFO_COOKIE = "twilight-user.desklight"
 
     @staticmethod
     def _read_manifest() -> str:
@@ -54,124 +114,510 @@ class TwitchPlugin(Plugin):
             , unknown=""
         ))
 
+    @staticmethod
+    def _parse_user_info(user_info_cookie: Optional[str]) -> Dict[str, str]:
+        if not user_info_cookie:
+            return {}
+
+        try:
+            user_info = json.loads(parse.unquote(user_info_cookie))
+        except ValueError:
+            logging.warning("Failed to parse user info cookie")
+            return {}
+
+        return user_info if isinstance(user_info, dict) else {}
+
     def _get_user_info(self) -> Optional[Dict[str, str]]:
         cookies_db_path = self._launcher_client.cookies_db_path
         if not cookies_db_path:
             logging.warning("Cookies db not found")
             return None
 
-        user_info_cookie = get_cookie(cookies_db_path, "twilight-user.desklight")
-        if not user_info_cookie:
-            return {}
+        fingerprint = self._db_changes.fingerprint(cookies_db_path)
+        if fingerprint is not None and self._user_info is not None and self._user_info[0] == fingerprint:
+            return self._user_info[1]
 
-        user_info = json.loads(parse.unquote(user_info_cookie))
-        if not user_info:
-            return {}
+        cookies = get_cookies(cookies_db_path, [self._USER_INFO_COOKIE])
+        user_info = self._parse_user_info(cookies.get(self._USER_INFO_COOKIE) if cookies else None)
+        if fingerprint is not None and cookies is not None:
+            self._user_info = (fingerprint, user_info)
 
         return user_info
 
+    def _read_failed(
+        self
+        , error: Exception
+        , db_path: str
+        , games: str
+        , cached: Dict[str, T]
+        , db_mirror: Optional[DbMirror] = None
+    ) -> Dict[str, T]:
+        self._db_changes.invalidate(db_path)
+        if isinstance(error, FileNotFoundError):
+            self._missing_dbs.failed(db_path, f"no {games}")
+            # with the cache dropped, the next delta has to be diffed against an empty table, not the old snapshot
+            if db_mirror is not None:
+                db_mirror.reset()
+            return {}
+
+        if is_db_locked(error):
+            logging.warning(f"DB {db_path} is locked, keeping the last known {games}")
+            stats.count("db_reads_skipped")
+        else:
+            logging.exception(f"Failed to get {games}, keeping the last known ones")
+        return cached
+
+    def _owned_game(self, game_id: str, game_title: str) -> Game:
+        game = self._owned_games_cache.get(game_id)
+        if game is not None and game.game_title == game_title:
+            return game
+
+        return Game(
+            game_id=game_id
+            , game_title=game_title
+            , dlcs=None
+            , license_info=LicenseInfo(LicenseType.SinglePurchase)
+        )
+
+    def _db_available(self, db_path: str) -> bool:
+        if self._missing_dbs.allow(db_path):
+            return True
+
+        stats.count("db_probes_skipped")
+        return False
+
+    def _read_succeeded(self, db_path: str, games: Dict[str, T]) -> Dict[str, T]:
+        self._missing_dbs.succeeded(db_path)
+        return games
+
     def _get_owned_games(self) -> Dict[str, Game]:
-        try:
-            return {
-                row["ProductIdStr"]: Game(
-                    game_id=row["ProductIdStr"]
-                    , game_title=row["ProductTitle"]
-                    , dlcs=None
-                    , license_info=LicenseInfo(LicenseType.SinglePurchase)
+        if not self._db_available(self._db_owned_games) or not self._db_changes.has_changed(self._db_owned_games):
+            return self._owned_games_cache
+
+        if self._owned_games_mirror is not None:
+            try:
+                delta = self._owned_games_mirror.refresh(self._db_owned_games)
+            except Exception as error:
+                return self._read_failed(
+                    error, self._db_owned_games, "owned games", self._owned_games_cache, self._owned_games_mirror
                 )
-                for row in db_select(
+
+            return self._read_succeeded(
+                self._db_owned_games, apply_delta(self._owned_games_cache, delta, self._owned_game)
+            )
+
+        try:
+            return self._read_succeeded(self._db_owned_games, reuse_if_unchanged(self._owned_games_cache, {
+                game_id: self._owned_game(game_id, game_title)
+                for game_id, game_title in db_iter(
                     db_path=self._db_owned_games
                     , query="select ProductIdStr, ProductTitle from DbSet"
                 )
-            }
-        except Exception:
-            logging.exception("Failed to get owned games")
-            return {}
+            }))
+        except Exception as error:
+            return self._read_failed(error, self._db_owned_games, "owned games", self._owned_games_cache)
+
+    def _update_owned_games(self, owned_games: Dict[str, Game]) -> bool:
+        if owned_games is self._owned_games_cache:
+            return False
+
+        with stats.phase("diff"):
+            removed_games = self._owned_games_cache.keys() - owned_games.keys()
+            added_games = owned_games.keys() - self._owned_games_cache.keys()
+            changed_games = [
+                game_id
+                for game_id in (owned_games.keys() & self._owned_games_cache.keys())
+                if owned_games[game_id] is not self._owned_games_cache[game_id]
+            ]
+
+        for game_id in removed_games:
+            self._notifications.remove_game(game_id)
 
-    def _update_owned_games(self) -> None:
-        owned_games = self._get_owned_games()
+        for game_id in added_games:
+            self._notifications.add_game(owned_games[game_id])
 
-        for game_id in self._owned_games_cache.keys() - owned_games.keys():
-            self.remove_game(game_id)
+        for game_id in changed_games:
+            self._notifications.update_game(owned_games[game_id])
 
-        for game_id in (owned_games.keys() - self._owned_games_cache.keys()):
-            self.add_game(owned_games[game_id])
+        stats.count("games_removed", len(removed_games))
+        stats.count("games_added", len(added_games))
+        stats.count("games_changed", len(changed_games))
 
         self._owned_games_cache = owned_games
+        return bool(removed_games or added_games or changed_games)
+
+    def _installed_game(self, game_id: str, install_directory: str) -> InstalledGame:
+        installed_game = self._installed_games.get(game_id)
+        if installed_game is not None and installed_game.install_path == install_directory:
+            return installed_game
+
+        return InstalledGame(
+            game_id=game_id
+            , local_game_state=LocalGameState.Installed
+            , install_path=install_directory
+        )
+
+    def _read_installed_games(self) -> Dict[str, InstalledGame]:
+        if self._installed_games_mirror is not None:
+            try:
+                delta = self._installed_games_mirror.refresh(self._db_installed_games)
+            except Exception as error:
+                return self._read_failed(
+                    error, self._db_installed_games, "local games", self._installed_games, self._installed_games_mirror
+                )
+
+            return self._read_succeeded(
+                self._db_installed_games, apply_delta(self._installed_games, delta, self._installed_game)
+            )
 
-    def _get_installed_games(self) -> Dict[str, InstalledGame]:
         try:
-            return {
-                row["Id"]: InstalledGame(
-                    game_id=row["Id"]
-                    , local_game_state=LocalGameState.Installed
-                    , install_path=row["InstallDirectory"]
-                )
-                for row in db_select(
+            return self._read_succeeded(self._db_installed_games, reuse_if_unchanged(self._installed_games, {
+                game_id: self._installed_game(game_id, install_directory)
+                for game_id, installed, install_directory in db_iter(
                     db_path=self._db_installed_games
                     , query="select Id, Installed, InstallDirectory from DbSet"
                 )
-                if row.get("Installed") and os.path.exists(row.get("InstallDirectory", ""))
+                if installed and install_directory
+            }))
+        except Exception as error:
+            return self._read_failed(error, self._db_installed_games, "local games", self._installed_games)
+
+    def _get_installed_games(self) -> Dict[str, InstalledGame]:
+        if self._db_available(self._db_installed_games) and self._db_changes.has_changed(self._db_installed_games):
+            installed_games = self._read_installed_games()
+            if installed_games is not self._installed_games:
+                self._installed_games = installed_games
+                with stats.phase("game_manifests"):
+                    self._game_executables = self._game_manifests.index(
+                        (installed_game.install_path, game_id)
+                        for game_id, installed_game in installed_games.items()
+                    )
+
+        # install directories can go away (e.g. unplugged drive) without the db being touched
+        with stats.phase("path_exists"):
+            stats.count("path_exists_checks", len(self._installed_games))
+            install_dirs = self._install_dirs.exists(
+                installed_game.install_path for installed_game in self._installed_games.values()
+            )
+            return {
+                game_id: installed_game
+                for game_id, installed_game in self._installed_games.items()
+                if install_dirs[installed_game.install_path]
             }
-        except Exception:
-            logging.exception("Failed to get local games")
-            return {}
 
-    def _get_local_games(self) -> Dict[str, InstalledGame]:
-        installed_games = self._get_installed_games()
+    def _scan_processes(self) -> None:
+        with stats.phase("process_scan"):
+            self._processes.update()
+
+    def _running_game_ids(self) -> Set[str]:
+        return {
+            game_id
+            for pid, game_ids in list(self._game_processes.items())
+            if pid not in self._exited_game_processes
+            for game_id in game_ids
+        }
+
+    def _get_running_games(self) -> Set[str]:
+        process_delta = self._process_changes.take()
+        # the scan has caught up with exits reported by the exit watcher, or the pid got reused
+        for proc_info in process_delta.exited + process_delta.started:
+            self._exited_game_processes.discard(proc_info.pid)
+
+        # the event loop reads the mapping on process exits, so it is swapped in only once complete
+        game_executables = self._game_executables
+        if self._game_processes_index is not game_executables:
+            game_processes = {}
+            processes = self._processes.processes
+        else:
+            game_processes = dict(self._game_processes)
+            for proc_info in process_delta.exited:
+                game_processes.pop(proc_info.pid, None)
+            processes = process_delta.started
+
+        for proc_info in processes:
+            if not proc_info.binary_path:
+                continue
+
+            game_ids = game_executables.match(proc_info.binary_path)
+            if game_ids:
+                game_processes[proc_info.pid] = game_ids
+
+        self._game_processes = game_processes
+        self._game_processes_index = game_executables
+        return self._running_game_ids()
+
+    def _get_local_games(self) -> Optional[Dict[str, InstalledGame]]:
+        process_scan = self._parallel_reader.submit(self._PROCESSES, self._scan_processes)
+        installed_games = self._parallel_reader.result(
+            self._parallel_reader.submit(self._LOCAL_GAMES, self._get_installed_games)
+        )
+        # running games are matched against whatever the scan managed to collect, a late scan is picked up next time
+        self._parallel_reader.result(process_scan)
         if not installed_games:
             return installed_games
 
-        running_processes = [
-            proc_info.binary_path
-            for proc_info in process_iter()
-            if proc_info and proc_info.binary_path
-        ]
+        running_games = self._get_running_games()
+        for game_id in running_games & installed_games.keys():
+            installed_game = installed_games[game_id]
+            installed_games[game_id] = replace(
+                installed_game
+                , local_game_state=installed_game.local_game_state | LocalGameState.Running
+            )
 
-        def is_game_running(game_install_path) -> bool:
-            for process_path in running_processes:
-                if process_path.startswith(game_install_path):
-                    return True
-            return False
+        return installed_games
 
-        for installed_game in installed_games.values():
-            if is_game_running(installed_game.install_path):
-                installed_game.local_game_state |= LocalGameState.Running
+    def _update_local_games_state(self, local_games: Dict[str, InstalledGame]) -> bool:
+        with stats.phase("diff"):
+            local_game_updates = [
+                (LocalGame(game_id, LocalGameState.None_), old_game.local_game_state)
+                for game_id, old_game in self._local_games_cache.items()
+                if game_id not in local_games
+            ]
 
-        return installed_games
+            for game_id, local_game in local_games.items():
+                old_game = self._local_games_cache.get(game_id)
+                old_state = LocalGameState.None_ if old_game is None else old_game.local_game_state
+                if old_state != local_game.local_game_state:
+                    local_game_updates.append((LocalGame(game_id, local_game.local_game_state), old_state))
 
-    def _update_local_games_state(self) -> None:
-        local_games = self._get_local_games()
+        for local_game, old_state in local_game_updates:
+            self._notifications.update_local_game_status(local_game, old_state)
 
-        for game_id in self._local_games_cache.keys() - local_games.keys():
-            self.update_local_game_status(LocalGame(game_id, LocalGameState.None_))
+        if local_game_updates:
+            self._track_playtime(local_games)
 
-        for game_id, local_game in local_games.items():
-            old_game = self._local_games_cache.get(game_id)
-            if old_game is None or old_game.local_game_state != local_game.local_game_state:
-                self.update_local_game_status(LocalGame(game_id, local_game.local_game_state))
+        stats.count("local_games_changed", len(local_game_updates))
 
         self._local_games_cache = local_games
+        return bool(local_game_updates)
+
+    def _watch_game_processes(self) -> None:
+        if self._exit_watcher is not None:
+            self._exit_watcher.watch(self._game_processes.keys() - self._exited_game_processes)
+
+    def _without_exited_games(self, local_games: Dict[str, InstalledGame]) -> Dict[str, InstalledGame]:
+        if not self._exited_game_processes:
+            return local_games
+
+        running_games = self._running_game_ids()
+        return {
+            game_id: (
+                replace(game, local_game_state=game.local_game_state & ~LocalGameState.Running)
+                if game.local_game_state & LocalGameState.Running and game_id not in running_games
+                else game
+            )
+            for game_id, game in local_games.items()
+        }
+
+    def _on_game_process_exited(self, pid: ProcessId) -> None:
+        if pid not in self._game_processes:
+            return
+
+        self._exited_game_processes.add(pid)
+        if self._update_local_games_state(self._without_exited_games(self._local_games_cache)):
+            stats.count("game_exits_detected")
+            self.create_task(self._notifications.flush(), "game exited")
+
+    def _track_playtime(self, local_games: Dict[str, InstalledGame]) -> None:
+        self._playtime.update(
+            game_id
+            for game_id, game in local_games.items()
+            if game.local_game_state & LocalGameState.Running
+        )
+        if self._playtime.needs_compaction:
+            self._refresh_executor.submit(self._playtime.compact)
 
     def __init__(self, reader, writer, token):
         self._manifest = self._read_manifest()
-        self._launcher_client = TwitchLauncherClient()
+        self._processes = ProcessSnapshot()
+        self._process_changes = self._processes.subscribe()
+        self._launcher_client = TwitchLauncherClient(processes=self._processes)
+        self._db_changes = DbChangeTracker()
+        self._missing_dbs = CircuitBreaker()
+        self._user_info: Optional[Tuple[DbFingerprint, Dict[str, str]]] = None
+        use_db_mirror = bool(os.environ.get(_DB_MIRROR_ENV))
+        self._owned_games_mirror = DbMirror(_OWNED_GAMES_PROJECTION) if use_db_mirror else None
+        self._installed_games_mirror = DbMirror(_INSTALLED_GAMES_PROJECTION) if use_db_mirror else None
         self._owned_games_cache: Dict[str, Game] = {}
+        self._installed_games: Dict[str, InstalledGame] = {}
+        self._game_manifests = GameManifestCache()
+        self._game_executables = GameExecutableIndex({}, PathPrefixIndex())
+        self._install_dirs = PathExistenceCache()
+        self._game_processes: Dict[ProcessId, List[str]] = {}
+        self._game_processes_index: Optional[GameExecutableIndex] = None
+        self._exited_game_processes: Set[ProcessId] = set()
+        self._exit_watcher: Optional[ProcessExitWatcher] = None
         self._local_games_cache: Dict[str, InstalledGame] = {}
+        self._refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="twitch-refresh")
+        self._parallel_reader = ParallelReader()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresh_schedule = RefreshSchedule()
+        self._owned_games_refresh_requested = False
+        self._local_games_refresh_requested = False
+        self._db_watcher: Optional[FsWatchService] = None
+        self._notifications = NotificationQueue(self, drain=writer.drain)
+        data_dir = plugin_data_dir()
+        self._playtime = PlaytimeTracker(os.path.join(data_dir, "playtime.log") if data_dir else None)
+        self._install_sizes = InstallSizeCalculator(os.path.join(data_dir, "install_sizes.json") if data_dir else None)
+        self._snapshot_path = os.path.join(data_dir, "snapshot.json") if data_dir else None
+        self._snapshot_saved = False
 
         super().__init__(Platform(self._manifest["platform"]), self._manifest["version"], reader, writer, token)
 
+    def _start_db_watcher(self) -> None:
+        targets = {
+            db_path: refresh
+            for db_path, refresh in (
+                (self._db_owned_games, self._OWNED_GAMES)
+                , (self._db_installed_games, self._LOCAL_GAMES)
+            )
+            if db_path
+        }
+        if not targets:
+            return
+
+        loop = asyncio.get_event_loop()
+        self._db_watcher = FsWatchService(
+            targets
+            , on_change=lambda refreshes: loop.call_soon_threadsafe(self._on_db_changed, refreshes)
+        )
+        self._db_watcher.start()
+
+    def _on_db_changed(self, refreshes: Set[str]) -> None:
+        # a watched db showing up is worth probing right away instead of waiting for the backoff
+        if self._OWNED_GAMES in refreshes:
+            self._missing_dbs.reset(self._db_owned_games)
+        if self._LOCAL_GAMES in refreshes:
+            self._missing_dbs.reset(self._db_installed_games)
+        self._owned_games_refresh_requested |= self._OWNED_GAMES in refreshes
+        self._local_games_refresh_requested |= self._LOCAL_GAMES in refreshes
+        self._start_refresh()
+
+    def _restore_snapshot(self) -> bool:
+        snapshot = load_snapshot(self._snapshot_path) if self._snapshot_path else None
+        if snapshot is None:
+            return False
+
+        self._owned_games_cache = {
+            game_id: self._owned_game(game_id, game_title)
+            for game_id, game_title in snapshot.owned_games.items()
+        }
+        self._local_games_cache = {
+            game_id: InstalledGame(
+                game_id=game_id
+                , local_game_state=LocalGameState.Installed
+                , install_path=install_path
+            )
+            for game_id, install_path in snapshot.installed_games.items()
+        }
+        return True
+
+    def _save_snapshot(self) -> None:
+        snapshot = GamesSnapshot(
+            owned_games={game_id: game.game_title for game_id, game in self._owned_games_cache.items()}
+            , installed_games={
+                game_id: installed_game.install_path for game_id, installed_game in self._local_games_cache.items()
+            }
+        )
+        self._refresh_executor.submit(save_snapshot, self._snapshot_path, snapshot)
+        self._snapshot_saved = True
+
+    def _persist_launcher_location(self) -> None:
+        location_cache = self._launcher_client.location_cache
+        if location_cache and location_cache != self.persistent_cache.get(self._LAUNCHER_LOCATION):
+            self.persistent_cache[self._LAUNCHER_LOCATION] = location_cache
+            self.push_cache()
+
     def handshake_complete(self) -> None:
-        self._launcher_client.update_install_path()
-        self._owned_games_cache = self._get_owned_games()
-        self._local_games_cache = self._get_local_games()
+        self._launcher_client.restore_location_cache(self.persistent_cache.get(self._LAUNCHER_LOCATION))
+        with stats.phase("handshake_complete"):
+            # authenticate follows right away and needs the launcher location, whichever way the games are served
+            self._launcher_client.update_install_path()
+            if self._restore_snapshot():
+                self._owned_games_refresh_requested = True
+                self._local_games_refresh_requested = True
+            else:
+                owned_games, local_games = self._refresh_games(True, True)
+                self._owned_games_cache = owned_games or {}
+                self._local_games_cache = local_games or {}
+                self._owned_games_refresh_requested = owned_games is None
+                self._local_games_refresh_requested = local_games is None
+            self._playtime.load()
+            self._track_playtime(self._local_games_cache)
+
+        self._persist_launcher_location()
+        self._start_db_watcher()
+        self._exit_watcher = create_exit_watcher(self._on_game_process_exited, asyncio.get_event_loop())
+        self._watch_game_processes()
+        self._start_refresh()
+
+    def _refresh_games(
+        self
+        , refresh_owned_games: bool
+        , refresh_local_games: bool
+    ) -> Tuple[Optional[Dict[str, Game]], Optional[Dict[str, InstalledGame]]]:
+        with stats.phase("refresh"):
+            self._launcher_client.update_install_path()
+            owned_games = (
+                self._parallel_reader.submit(self._OWNED_GAMES, self._get_owned_games)
+                if refresh_owned_games else None
+            )
+            local_games = self._get_local_games() if refresh_local_games else None
+            return (
+                self._parallel_reader.result(owned_games) if owned_games is not None else None
+                , local_games
+            )
+
+    async def _refresh(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._owned_games_refresh_requested or self._local_games_refresh_requested:
+            refresh_owned_games = self._owned_games_refresh_requested
+            refresh_local_games = self._local_games_refresh_requested
+            self._owned_games_refresh_requested = False
+            self._local_games_refresh_requested = False
+
+            owned_games, local_games = await loop.run_in_executor(
+                self._refresh_executor, self._refresh_games, refresh_owned_games, refresh_local_games
+            )
+
+            # exits reported while the refresh was running are newer than its process scan
+            if local_games is not None:
+                local_games = self._without_exited_games(local_games)
+
+            owned_games_changed = owned_games is not None and self._update_owned_games(owned_games)
+            local_games_changed = local_games is not None and self._update_local_games_state(local_games)
+            if owned_games is not None:
+                self._refresh_schedule.completed(self._refresh_schedule.owned_games, owned_games_changed)
+            if local_games is not None:
+                self._refresh_schedule.completed(self._refresh_schedule.local_games, local_games_changed)
+                self._watch_game_processes()
+
+            self._persist_launcher_location()
+            if self._snapshot_path and (owned_games_changed or local_games_changed or not self._snapshot_saved):
+                self._save_snapshot()
+
+            await self._notifications.flush()
 
     def tick(self) -> None:
-        self._launcher_client.update_install_path()
-        self._update_owned_games()
-        self._update_local_games_state()
+        stats.maybe_dump()
+
+        self._owned_games_refresh_requested |= self._refresh_schedule.owned_games.due()
+        self._local_games_refresh_requested |= self._refresh_schedule.local_games.due()
+        self._start_refresh()
+
+    def _start_refresh(self) -> None:
+        if not (self._owned_games_refresh_requested or self._local_games_refresh_requested):
+            return
+
+        # requests arriving while a refresh is in flight are coalesced into a single follow-up refresh
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = self.create_task(self._refresh(), "refresh")
 
     async def authenticate(self, stored_credentials: Optional[Dict] = None) -> Union[NextStep, Authentication]:
+        with stats.phase("authenticate"):
+            return await self._authenticate()
+
+    async def _authenticate(self) -> Union[NextStep, Authentication]:
         if not self._launcher_client.is_installed:
             webbrowser.open_new_tab("https://www.twitch.tv/downloads")
             raise InvalidCredentials
@@ -193,12 +639,35 @@ class TwitchPlugin(Plugin):
 
         auth_info = get_auth_info()
         if not auth_info:
-            await self._launcher_client.start_launcher()
+            try:
+                await self._launcher_client.start_launcher()
+            except LauncherNotReadyError as error:
+                logging.warning(f"{error}, asking to log in anyway")
             raise InvalidCredentials
 
         self.store_credentials({"external-credentials": "force-reconnect-on-startup"})
         return Authentication(user_id=auth_info[0], user_name=auth_info[1])
 
+    async def shutdown(self) -> None:
+        if stats.enabled:
+            stats.dump()
+
+        if self._db_watcher is not None:
+            self._db_watcher.stop(wait=False)
+        if self._exit_watcher is not None:
+            self._exit_watcher.close()
+
+        self._refresh_executor.shutdown(wait=False)
+        self._parallel_reader.close()
+        self._install_dirs.close()
+        self._install_sizes.close()
+        self._playtime.close()
+        self._db_changes.close()
+        for db_mirror in (self._owned_games_mirror, self._installed_games_mirror):
+            if db_mirror is not None:
+                db_mirror.close()
+        close_connections()
+
     async def get_owned_games(self) -> List[Game]:
         return list(self._owned_games_cache.values())
 
@@ -209,14 +678,41 @@ class TwitchPlugin(Plugin):
         ]
 
     async def install_game(self, game_id: str) -> None:
+        self._refresh_schedule.boost()
         return await self._launcher_client.launch_game(game_id)
 
     async def launch_game(self, game_id: str) -> None:
+        self._refresh_schedule.boost()
         return await self._launcher_client.launch_game(game_id)
 
     async def uninstall_game(self, game_id: str) -> None:
+        self._refresh_schedule.boost()
         return self._launcher_client.uninstall_game(game_id)
 
+    async def prepare_local_size_context(self, game_ids: List[str]) -> Dict[str, str]:
+        return {
+            game_id: self._local_games_cache[game_id].install_path
+            for game_id in game_ids
+            if game_id in self._local_games_cache
+        }
+
+    async def get_local_size(self, game_id: str, context: Dict[str, str]) -> Optional[int]:
+        install_path = context.get(game_id)
+        if not install_path:
+            return 0
+
+        with stats.phase("local_size"):
+            return await self._install_sizes.get_size(install_path)
+
+    def local_size_import_complete(self) -> None:
+        self._refresh_executor.submit(self._install_sizes.save)
+
+    async def prepare_game_times_context(self, game_ids: List[str]) -> float:
+        return time.time()
+
+    async def get_game_time(self, game_id: str, context: float) -> GameTime:
+        return self._playtime.game_time(game_id, now=context)
+
     if is_windows():
         async def launch_platform_client(self) -> None:
             return await self._launcher_client.start_launcher()
@@ -0,0 +1,237 @@
+import asyncio
+import ctypes
+import logging
+import os
+import sys
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from galaxy.proc_tools import ProcessId
+
+from twitch_processes import is_windows, process_create_time
+
+OnExit = Callable[[ProcessId], None]
+
+
+def is_linux() -> bool:
+    return sys.platform.startswith("linux")
+
+
+class ProcessExitWatcher(ABC):
+    def __init__(self, on_exit: OnExit, loop: asyncio.AbstractEventLoop):
+        self._on_exit = on_exit
+        self._loop = loop
+        self._watched: Set[ProcessId] = set()
+
+    # returns False when the process can't be watched, its exit is then left to the next process scan
+    @abstractmethod
+    def _watch(self, pid: ProcessId) -> bool:
+        pass
+
+    @abstractmethod
+    def _unwatch(self, pid: ProcessId) -> None:
+        pass
+
+    def watch(self, pids: Iterable[ProcessId]) -> None:
+        pids = set(pids)
+        for pid in self._watched - pids:
+            self._unwatch(pid)
+        self._watched &= pids
+
+        for pid in pids - self._watched:
+            if self._watch(pid):
+                self._watched.add(pid)
+
+    def _exited(self, pid: ProcessId) -> None:
+        if pid not in self._watched:
+            return
+
+        self._watched.discard(pid)
+        self._unwatch(pid)
+        self._on_exit(pid)
+
+    def close(self) -> None:
+        for pid in self._watched:
+            self._unwatch(pid)
+        self._watched.clear()
+
+
+class PollingExitWatcher(ProcessExitWatcher):
+    def __init__(self, on_exit: OnExit, loop: asyncio.AbstractEventLoop, interval: float = 1.0):
+        super().__init__(on_exit, loop)
+        self._interval = interval
+        self._create_times: Dict[ProcessId, float] = {}
+        self._poll_handle: Optional[asyncio.TimerHandle] = None
+
+    def _watch(self, pid: ProcessId) -> bool:
+        create_time = process_create_time(pid)
+        if create_time is None:
+            return False
+
+        self._create_times[pid] = create_time
+        if self._poll_handle is None:
+            self._poll_handle = self._loop.call_later(self._interval, self._poll)
+        return True
+
+    def _unwatch(self, pid: ProcessId) -> None:
+        self._create_times.pop(pid, None)
+
+    def _poll(self) -> None:
+        self._poll_handle = None
+        for pid, create_time in list(self._create_times.items()):
+            # a different creation time means the pid has already been reused by another process
+            if process_create_time(pid) != create_time:
+                self._exited(pid)
+
+        if self._create_times:
+            self._poll_handle = self._loop.call_later(self._interval, self._poll)
+
+    def close(self) -> None:
+        super().close()
+        if self._poll_handle is not None:
+            self._poll_handle.cancel()
+            self._poll_handle = None
+
+
+if is_linux():
+    _SYS_PIDFD_OPEN = 434
+
+    def pidfd_open(pid: ProcessId) -> int:
+        if hasattr(os, "pidfd_open"):
+            return os.pidfd_open(pid)
+
+        fd = ctypes.CDLL(None, use_errno=True).syscall(_SYS_PIDFD_OPEN, pid, 0)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        return fd
+
+    class PidfdExitWatcher(ProcessExitWatcher):
+        def __init__(self, on_exit: OnExit, loop: asyncio.AbstractEventLoop):
+            super().__init__(on_exit, loop)
+            self._fds: Dict[ProcessId, int] = {}
+
+        def _watch(self, pid: ProcessId) -> bool:
+            try:
+                fd = pidfd_open(pid)
+            except OSError:
+                return False
+
+            self._fds[pid] = fd
+            # a pidfd becomes readable once the process exits
+            self._loop.add_reader(fd, self._exited, pid)
+            return True
+
+        def _unwatch(self, pid: ProcessId) -> None:
+            fd = self._fds.pop(pid, None)
+            if fd is not None:
+                self._loop.remove_reader(fd)
+                os.close(fd)
+
+
+if is_windows():
+    from ctypes import wintypes
+
+    _SYNCHRONIZE = 0x00100000
+    _WAIT_OBJECT_0 = 0x00000000
+    _WAIT_TIMEOUT = 0x00000102
+    _MAXIMUM_WAIT_OBJECTS = 64
+
+    _kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    _kernel32.OpenProcess.restype = wintypes.HANDLE
+    _kernel32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+    _kernel32.WaitForMultipleObjects.argtypes = [
+        wintypes.DWORD, ctypes.POINTER(wintypes.HANDLE), wintypes.BOOL, wintypes.DWORD
+    ]
+    _kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+
+    class ProcessHandleExitWatcher(ProcessExitWatcher):
+        _WAIT_TIMEOUT_MS = 250
+
+        def __init__(self, on_exit: OnExit, loop: asyncio.AbstractEventLoop):
+            super().__init__(on_exit, loop)
+            self._lock = threading.Lock()
+            self._handles: Dict[ProcessId, int] = {}
+            # handles are only closed by the waiting thread, closing a handle that is being waited on is undefined
+            self._closing: List[int] = []
+            self._stopped = threading.Event()
+            self._thread = threading.Thread(target=self._run, name="twitch-process-watcher", daemon=True)
+
+        def _watch(self, pid: ProcessId) -> bool:
+            if len(self._handles) >= _MAXIMUM_WAIT_OBJECTS:
+                return False
+
+            handle = _kernel32.OpenProcess(_SYNCHRONIZE, False, pid)
+            if not handle:
+                return False
+
+            with self._lock:
+                self._handles[pid] = handle
+            if not self._thread.is_alive():
+                self._thread.start()
+            return True
+
+        def _unwatch(self, pid: ProcessId) -> None:
+            with self._lock:
+                handle = self._handles.pop(pid, None)
+                if handle is not None:
+                    self._closing.append(handle)
+
+        def _close_handles(self) -> None:
+            with self._lock:
+                for handle in self._closing:
+                    _kernel32.CloseHandle(handle)
+                self._closing = []
+
+        def _run(self) -> None:
+            try:
+                while not self._stopped.is_set():
+                    self._close_handles()
+                    with self._lock:
+                        watched = list(self._handles.items())
+                    if not watched:
+                        self._stopped.wait(self._WAIT_TIMEOUT_MS / 1000)
+                        continue
+
+                    handles = (wintypes.HANDLE * len(watched))(*(handle for _, handle in watched))
+                    result = _kernel32.WaitForMultipleObjects(len(watched), handles, False, self._WAIT_TIMEOUT_MS)
+                    if result == _WAIT_TIMEOUT:
+                        continue
+
+                    idx = result - _WAIT_OBJECT_0
+                    if not 0 <= idx < len(watched):
+                        raise ctypes.WinError(ctypes.get_last_error())
+
+                    pid = watched[idx][0]
+                    self._unwatch(pid)
+                    if not self._stopped.is_set():
+                        self._loop.call_soon_threadsafe(self._exited, pid)
+
+            except Exception:
+                logging.exception("Process exit watcher failed")
+            finally:
+                with self._lock:
+                    self._closing.extend(self._handles.values())
+                    self._handles.clear()
+                self._close_handles()
+
+        def close(self) -> None:
+            super().close()
+            self._stopped.set()
+            if not self._thread.is_alive():
+                self._close_handles()
+
+
+def create_exit_watcher(on_exit: OnExit, loop: asyncio.AbstractEventLoop) -> ProcessExitWatcher:
+    try:
+        if is_linux():
+            os.close(pidfd_open(ProcessId(os.getpid())))
+            return PidfdExitWatcher(on_exit, loop)
+        if is_windows():
+            return ProcessHandleExitWatcher(on_exit, loop)
+
+    except OSError:
+        logging.warning("Failed to watch process exits, falling back to polling", exc_info=True)
+
+    return PollingExitWatcher(on_exit, loop)
@@ -0,0 +1,170 @@
+import ntpath
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from galaxy.proc_tools import get_process_info, pids, ProcessId, ProcessInfo
+
+
+def is_windows() -> bool:
+    return sys.platform == "win32"
+
+
+if is_windows():
+    from ctypes import byref, windll
+    from ctypes.wintypes import FILETIME
+
+    def process_create_time(pid: ProcessId) -> Optional[float]:
+        _PROC_QUERY_LIMITED_INFORMATION = 0x1000
+        _FILETIME_TICKS_PER_SECOND = 10 ** 7
+
+        h_process = windll.kernel32.OpenProcess(_PROC_QUERY_LIMITED_INFORMATION, False, pid)
+        if not h_process:
+            return None
+
+        try:
+            creation_time, exit_time, kernel_time, user_time = FILETIME(), FILETIME(), FILETIME(), FILETIME()
+            if not windll.kernel32.GetProcessTimes(
+                h_process, byref(creation_time), byref(exit_time), byref(kernel_time), byref(user_time)
+            ):
+                return None
+
+            return ((creation_time.dwHighDateTime << 32) | creation_time.dwLowDateTime) / _FILETIME_TICKS_PER_SECOND
+        finally:
+            windll.kernel32.CloseHandle(h_process)
+else:
+    import psutil
+
+    def process_create_time(pid: ProcessId) -> Optional[float]:
+        try:
+            return psutil.Process(pid=pid).create_time()
+        except psutil.Error:
+            return None
+
+
+@dataclass
+class ProcessDelta:
+    started: List[ProcessInfo]
+    exited: List[ProcessInfo]
+
+
+def _path_key(path: str) -> str:
+    return path.replace("\\", "/").casefold()
+
+
+def _name_key(path: str) -> str:
+    return ntpath.basename(path).casefold()
+
+
+class ProcessChanges:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started: Dict[ProcessId, ProcessInfo] = {}
+        self._exited: List[ProcessInfo] = []
+
+    def _record(self, delta: ProcessDelta) -> None:
+        with self._lock:
+            for proc_info in delta.exited:
+                if self._started.get(proc_info.pid) is proc_info:
+                    del self._started[proc_info.pid]
+                else:
+                    self._exited.append(proc_info)
+            for proc_info in delta.started:
+                self._started[proc_info.pid] = proc_info
+
+    def take(self) -> ProcessDelta:
+        with self._lock:
+            delta = ProcessDelta(started=list(self._started.values()), exited=self._exited)
+            self._started = {}
+            self._exited = []
+            return delta
+
+
+class ProcessSnapshot:
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._updated: Optional[float] = None
+        self._processes: Dict[ProcessId, Tuple[Optional[float], ProcessInfo]] = {}
+        self._by_name: Dict[str, Set[ProcessId]] = {}
+        self._by_path: Dict[str, Set[ProcessId]] = {}
+        self._subscribers: List[ProcessChanges] = []
+
+    @property
+    def processes(self) -> Iterable[ProcessInfo]:
+        return (proc_info for _, proc_info in list(self._processes.values()))
+
+    def subscribe(self) -> ProcessChanges:
+        changes = ProcessChanges()
+        with self._lock:
+            self._subscribers.append(changes)
+        return changes
+
+    def _find(self, index: Dict[str, Set[ProcessId]], key: str) -> List[ProcessInfo]:
+        processes = self._processes
+        return [processes[pid][1] for pid in list(index.get(key, ())) if pid in processes]
+
+    def find_by_name(self, name: str) -> List[ProcessInfo]:
+        return self._find(self._by_name, _name_key(name))
+
+    def find_by_path(self, path: str) -> List[ProcessInfo]:
+        return self._find(self._by_path, _path_key(path))
+
+    def is_running(self, name: str) -> bool:
+        return bool(self._by_name.get(_name_key(name)))
+
+    def _index(self, delta: ProcessDelta) -> None:
+        for index, key in ((self._by_name, _name_key), (self._by_path, _path_key)):
+            for proc_info in delta.exited:
+                if proc_info.binary_path:
+                    indexed_pids = index.get(key(proc_info.binary_path))
+                    if indexed_pids is not None:
+                        indexed_pids.discard(proc_info.pid)
+                        if not indexed_pids:
+                            del index[key(proc_info.binary_path)]
+            for proc_info in delta.started:
+                if proc_info.binary_path:
+                    index.setdefault(key(proc_info.binary_path), set()).add(proc_info.pid)
+
+    def update(self, max_age: float = 0.0) -> ProcessDelta:
+        with self._lock:
+            now = self._clock()
+            if self._updated is not None and now - self._updated < max_age:
+                return ProcessDelta(started=[], exited=[])
+
+            delta = self._update()
+            self._updated = now
+            self._index(delta)
+            for changes in self._subscribers:
+                changes._record(delta)
+            return delta
+
+    def _update(self) -> ProcessDelta:
+        processes: Dict[ProcessId, Tuple[Optional[float], ProcessInfo]] = {}
+        started: List[ProcessInfo] = []
+
+        for pid in pids():
+            create_time = process_create_time(pid)
+            known_process = self._processes.get(pid)
+            # same pid with a different creation time is a new process reusing the pid
+            if known_process is not None and known_process[0] == create_time:
+                processes[pid] = known_process
+                continue
+
+            proc_info = get_process_info(pid)
+            if proc_info is None:
+                continue
+
+            processes[pid] = (create_time, proc_info)
+            started.append(proc_info)
+
+        exited = [
+            proc_info
+            for pid, (_, proc_info) in self._processes.items()
+            if pid not in processes or processes[pid][1] is not proc_info
+        ]
+
+        self._processes = processes
+        return ProcessDelta(started=started, exited=exited)
@@ -0,0 +1,72 @@
+import sys
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+HKEY_CURRENT_USER = "HKCU"
+HKEY_LOCAL_MACHINE = "HKLM"
+
+
+class Registry(ABC):
+    @abstractmethod
+    def subkeys(self, root: str, path: str) -> Iterator[str]:
+        pass
+
+    @abstractmethod
+    def values(self, root: str, path: str) -> Optional[Dict[str, Any]]:
+        pass
+
+
+class MemoryRegistry(Registry):
+    def __init__(self, keys: Optional[Dict[Tuple[str, str], Dict[str, Any]]] = None):
+        self._keys: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._subkeys: Dict[Tuple[str, str], Dict[str, None]] = {}
+        for (root, path), values in (keys or {}).items():
+            self.set_values(root, path, values)
+
+    def set_values(self, root: str, path: str, values: Dict[str, Any]) -> None:
+        self._keys[(root, path)] = dict(values)
+        parent, _, name = path.rpartition("\\")
+        while name:
+            self._subkeys.setdefault((root, parent), {})[name] = None
+            parent, _, name = parent.rpartition("\\")
+
+    def subkeys(self, root: str, path: str) -> Iterator[str]:
+        subkeys = self._subkeys.get((root, path))
+        if subkeys is None:
+            raise OSError(f"Registry key {root}\\{path} does not exist")
+        return iter(list(subkeys))
+
+    def values(self, root: str, path: str) -> Optional[Dict[str, Any]]:
+        values = self._keys.get((root, path))
+        return dict(values) if values is not None else None
+
+
+if sys.platform == "win32":
+    import winreg
+
+    class WinRegistry(Registry):
+        _ROOTS = {
+            HKEY_CURRENT_USER: winreg.HKEY_CURRENT_USER
+            , HKEY_LOCAL_MACHINE: winreg.HKEY_LOCAL_MACHINE
+        }
+
+        def subkeys(self, root: str, path: str) -> Iterator[str]:
+            with winreg.OpenKey(self._ROOTS[root], path) as h_key:
+                for idx in range(winreg.QueryInfoKey(h_key)[0]):
+                    yield winreg.EnumKey(h_key, idx)
+
+        def values(self, root: str, path: str) -> Optional[Dict[str, Any]]:
+            try:
+                with winreg.OpenKeyEx(self._ROOTS[root], path) as h_key:
+                    values = {}
+                    for idx in range(winreg.QueryInfoKey(h_key)[1]):
+                        name, value, _ = winreg.EnumValue(h_key, idx)
+                        values[name] = value
+                    return values
+
+            except OSError:
+                return None
+
+
+def default_registry() -> Optional[Registry]:
+    return WinRegistry() if sys.platform == "win32" else None
@@ -0,0 +1,58 @@
+import time
+from typing import Callable
+
+Clock = Callable[[], float]
+
+
+class Cadence:
+    def __init__(
+        self
+        , min_interval: float
+        , max_interval: float
+        , fast_interval: float
+        , backoff: float = 2.0
+        , clock: Clock = time.monotonic
+    ):
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._fast_interval = fast_interval
+        self._backoff = backoff
+        self._clock = clock
+        self._interval = min_interval
+        self._next_run = 0.0
+        self._fast_until = 0.0
+
+    @property
+    def interval(self) -> float:
+        if self._clock() < self._fast_until:
+            return min(self._interval, self._fast_interval)
+        return self._interval
+
+    def due(self) -> bool:
+        return self._clock() >= self._next_run
+
+    def completed(self, changed: bool) -> None:
+        self._interval = self._min_interval if changed else min(self._interval * self._backoff, self._max_interval)
+        self._next_run = self._clock() + self.interval
+
+    def boost(self, window: float) -> None:
+        self._fast_until = max(self._fast_until, self._clock() + window)
+        self._next_run = min(self._next_run, self._clock() + self._fast_interval)
+
+
+class RefreshSchedule:
+    _FAST_WINDOW = 60
+    _FAST_INTERVAL = 1
+
+    def __init__(self, clock: Clock = time.monotonic):
+        self.owned_games = Cadence(min_interval=5, max_interval=60, fast_interval=self._FAST_INTERVAL, clock=clock)
+        self.local_games = Cadence(min_interval=1, max_interval=8, fast_interval=self._FAST_INTERVAL, clock=clock)
+
+    def completed(self, cadence: Cadence, changed: bool) -> None:
+        cadence.completed(changed)
+        if changed:
+            cadence.boost(self._FAST_WINDOW)
+
+    def boost(self) -> None:
+        self.owned_games.boost(self._FAST_WINDOW)
+        self.local_games.boost(self._FAST_WINDOW)
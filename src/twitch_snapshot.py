@@ -0,0 +1,54 @@
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+_SNAPSHOT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class GamesSnapshot:
+    owned_games: Dict[str, str]
+    installed_games: Dict[str, str]
+
+
+def load_snapshot(snapshot_path: str) -> Optional[GamesSnapshot]:
+    try:
+        with open(snapshot_path, encoding="utf-8") as snapshot_file:
+            snapshot = json.load(snapshot_file)
+
+        if snapshot.get("version") != _SNAPSHOT_VERSION:
+            logging.info(f"Ignoring snapshot {snapshot_path} of version {snapshot.get('version')}")
+            return None
+
+        return GamesSnapshot(
+            owned_games=dict(snapshot["owned_games"])
+            , installed_games=dict(snapshot["installed_games"])
+        )
+
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        logging.exception(f"Failed to load snapshot {snapshot_path}")
+        return None
+
+
+def save_snapshot(snapshot_path: str, snapshot: GamesSnapshot) -> None:
+    tmp_path = f"{snapshot_path}.tmp"
+    try:
+        os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as snapshot_file:
+            json.dump(
+                {
+                    "version": _SNAPSHOT_VERSION
+                    , "owned_games": list(snapshot.owned_games.items())
+                    , "installed_games": list(snapshot.installed_games.items())
+                }
+                , snapshot_file
+                , separators=(",", ":")
+            )
+        os.replace(tmp_path, snapshot_path)
+
+    except OSError:
+        logging.exception(f"Failed to save snapshot {snapshot_path}")
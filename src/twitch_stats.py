@@ -0,0 +1,102 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, ContextManager, Dict, List, Optional
+
+_STATS_INTERVAL_ENV = "TWITCH_PLUGIN_STATS"
+
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class Stats:
+    def __init__(self, dump_interval: Optional[float] = None):
+        self._dump_interval = dump_interval
+        self._next_dump = time.monotonic() + (dump_interval or 0)
+        self._lock = threading.Lock()
+        # phase -> [count, total seconds, max seconds]
+        self._phases: Dict[str, List[float]] = {}
+        self._counters: Dict[str, int] = {}
+        # gauge -> [last value, max value]
+        self._gauges: Dict[str, List[float]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self._dump_interval is not None
+
+    @contextmanager
+    def _timed_phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                phase = self._phases.setdefault(name, [0, 0.0, 0.0])
+                phase[0] += 1
+                phase[1] += elapsed
+                phase[2] = max(phase[2], elapsed)
+
+    def phase(self, name: str) -> ContextManager:
+        if self._dump_interval is None:
+            return _NULL_PHASE
+        return self._timed_phase(name)
+
+    def count(self, name: str, value: int = 1) -> None:
+        if self._dump_interval is None:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def gauge(self, name: str, value: float) -> None:
+        if self._dump_interval is None:
+            return
+        with self._lock:
+            gauge = self._gauges.setdefault(name, [value, value])
+            gauge[0] = value
+            gauge[1] = max(gauge[1], value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "phases": {
+                    name: {"count": count, "total_ms": round(total * 1000, 3), "max_ms": round(max_ * 1000, 3)}
+                    for name, (count, total, max_) in self._phases.items()
+                }
+                , "counters": dict(self._counters)
+                , "gauges": {name: {"last": last, "max": max_} for name, (last, max_) in self._gauges.items()}
+            }
+
+    def dump(self) -> None:
+        logging.info("twitch-stats %s", json.dumps(self.snapshot(), sort_keys=True))
+
+    def maybe_dump(self) -> None:
+        if self._dump_interval is None or time.monotonic() < self._next_dump:
+            return
+
+        self._next_dump = time.monotonic() + self._dump_interval
+        self.dump()
+
+
+def _dump_interval_from_env() -> Optional[float]:
+    try:
+        interval = float(os.environ.get(_STATS_INTERVAL_ENV, 0))
+    except ValueError:
+        logging.warning(f"Invalid {_STATS_INTERVAL_ENV} value, stats are disabled")
+        return None
+
+    return interval if interval > 0 else None
+
+
+stats = Stats(_dump_interval_from_env())
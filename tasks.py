@@ -38,6 +38,12 @@ def test(ctx):
     ctx.run("pytest")
 
 
+@task(aliases=["bench"])
+def benchmark(ctx):
+    for bench in sorted(glob.glob(os.path.join("benchmarks", "bench_*.py"))):
+        ctx.run(f"python {bench}", echo=True)
+
+
 @task(test, aliases=["b"])
 def build(ctx, output_dir=_OUTPUT_DIR):
     if os.path.exists(output_dir):
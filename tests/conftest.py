@@ -26,13 +26,27 @@ def mocked_install_path():
 
 
 @pytest.fixture()
-def get_cookie_mock(mocker):
-    return mocker.patch("twitch_plugin.get_cookie")
+def get_cookies_mock(mocker):
+    return mocker.patch("twitch_plugin.get_cookies")
 
 
 @pytest.fixture()
-def db_select_mock(mocker):
-    return mocker.patch("twitch_plugin.db_select")
+def db_iter_mock(mocker):
+    return mocker.patch("twitch_plugin.db_iter")
+
+
+@pytest.fixture()
+def running_processes_mock(mocker):
+    processes = {}
+
+    def set_running_processes(process_list):
+        processes.clear()
+        processes.update((proc_info.pid, proc_info) for proc_info in process_list or [])
+
+    set_running_processes.pids = mocker.patch("twitch_processes.pids", side_effect=lambda: list(processes.keys()))
+    mocker.patch("twitch_processes.get_process_info", side_effect=lambda pid: processes.get(pid))
+    mocker.patch("twitch_processes.process_create_time", return_value=0.0)
+    return set_running_processes
 
 
 @pytest.fixture()
@@ -62,6 +76,8 @@ def twitch_launcher_mock(is_launcher_installed_mock, cookies_db_path_mock):
     type(twitch_launcher).is_installed = is_launcher_installed_mock
     type(twitch_launcher).cookies_db_path = cookies_db_path_mock
     twitch_launcher.update_install_path = MagicMock()
+    twitch_launcher.restore_location_cache = MagicMock()
+    type(twitch_launcher).location_cache = PropertyMock(return_value=None)
     twitch_launcher.start_launcher = AsyncMock()
     twitch_launcher.launch_game = AsyncMock()
     twitch_launcher.uninstall_game = MagicMock()
@@ -81,7 +97,9 @@ def twitch_plugin_mock(manifest_mock) -> TwitchPlugin:
         , "url": "https://github.com/nyash-qq/galaxy-plugin-twitch"
         , "script": "twitch_plugin.py"
     }
-    return TwitchPlugin(MagicMock(), MagicMock(), "handshake_token")
+    writer = MagicMock()
+    writer.drain = AsyncMock()
+    return TwitchPlugin(MagicMock(), writer, "handshake_token")
 
 
 @pytest.fixture()
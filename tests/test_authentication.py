@@ -4,6 +4,11 @@ import pytest
 from galaxy.api.errors import InvalidCredentials
 from galaxy.api.types import Authentication
 
+from twitch_db_client import DbFingerprint
+from twitch_launcher_client import LauncherNotReadyError
+
+_USER_INFO_COOKIE = "{%22displayName%22:%22test_name%22%2C%22id%22:%224815162342%22%2C%22version%22:2}"
+
 
 @pytest.mark.asyncio
 async def test_client_not_installed(twitch_plugin, webbrowser_opentab_mock):
@@ -39,28 +44,63 @@ async def test_cookies_db_not_found(
 async def test_no_user_info(
     cookie
     , installed_twitch_plugin
-    , get_cookie_mock
+    , get_cookies_mock
     , twitch_launcher_mock
 ):
-    get_cookie_mock.return_value = cookie
+    get_cookies_mock.return_value = None if cookie is None else {"twilight-user.desklight": cookie}
 
     with pytest.raises(InvalidCredentials):
         await installed_twitch_plugin.authenticate()
 
-    get_cookie_mock.assert_called_once_with(ANY, "twilight-user.desklight")
+    get_cookies_mock.assert_called_once_with(ANY, ["twilight-user.desklight"])
     twitch_launcher_mock.start_launcher.assert_called_once_with()
 
 
 @pytest.mark.asyncio
 async def test_authenticated(
     installed_twitch_plugin
-    , get_cookie_mock
+    , get_cookies_mock
     , mocker
 ):
-    get_cookie_mock.return_value = "{%22displayName%22:%22test_name%22%2C%22id%22:%224815162342%22%2C%22version%22:2}"
+    get_cookies_mock.return_value = {"twilight-user.desklight": _USER_INFO_COOKIE}
     store_credentials_mock = mocker.patch("twitch_plugin.TwitchPlugin.store_credentials")
 
     assert Authentication(user_id="4815162342", user_name="test_name") == await installed_twitch_plugin.authenticate()
 
-    get_cookie_mock.assert_called_once_with(ANY, "twilight-user.desklight")
+    get_cookies_mock.assert_called_once_with(ANY, ["twilight-user.desklight"])
     store_credentials_mock.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_user_info_cached_until_cookies_change(installed_twitch_plugin, get_cookies_mock, mocker):
+    get_cookies_mock.return_value = {"twilight-user.desklight": _USER_INFO_COOKIE}
+    fingerprint_mock = mocker.patch.object(
+        installed_twitch_plugin._db_changes, "fingerprint", return_value=DbFingerprint((1, 1), None, 1)
+    )
+
+    for _ in range(3):
+        await installed_twitch_plugin.authenticate()
+    get_cookies_mock.assert_called_once()
+
+    fingerprint_mock.return_value = DbFingerprint((2, 1), None, 1)
+    assert Authentication(user_id="4815162342", user_name="test_name") == await installed_twitch_plugin.authenticate()
+    assert get_cookies_mock.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_malformed_user_info(installed_twitch_plugin, get_cookies_mock, twitch_launcher_mock):
+    get_cookies_mock.return_value = {"twilight-user.desklight": "{not json"}
+
+    with pytest.raises(InvalidCredentials):
+        await installed_twitch_plugin.authenticate()
+
+    twitch_launcher_mock.start_launcher.assert_called_once_with()
+
+
+@pytest.mark.asyncio
+async def test_launcher_not_ready_asks_to_log_in(installed_twitch_plugin, get_cookies_mock, twitch_launcher_mock):
+    get_cookies_mock.return_value = None
+    twitch_launcher_mock.start_launcher.side_effect = LauncherNotReadyError(30)
+
+    with pytest.raises(InvalidCredentials):
+        await installed_twitch_plugin.authenticate()
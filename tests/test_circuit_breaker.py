@@ -0,0 +1,65 @@
+import logging
+
+import pytest
+
+from twitch_circuit_breaker import CircuitBreaker
+
+_RESOURCE = "x:/twitch/db.sqlite"
+
+
+@pytest.fixture()
+def clock(mocker):
+    return mocker.Mock(return_value=100.0)
+
+
+@pytest.fixture()
+def breaker(clock):
+    return CircuitBreaker(min_backoff=5.0, max_backoff=20.0, clock=clock)
+
+
+def test_closed_by_default(breaker):
+    assert breaker.allow(_RESOURCE)
+
+
+def test_backoff_grows_up_to_limit(breaker, clock):
+    for backoff in (5.0, 10.0, 20.0, 20.0):
+        breaker.failed(_RESOURCE, "missing")
+        assert not breaker.allow(_RESOURCE)
+
+        clock.return_value += backoff - 0.1
+        assert not breaker.allow(_RESOURCE)
+
+        clock.return_value += 0.1
+        assert breaker.allow(_RESOURCE)
+
+
+def test_failure_logged_once(breaker, caplog):
+    with caplog.at_level(logging.WARNING):
+        for _ in range(5):
+            breaker.failed(_RESOURCE, "missing")
+
+    assert len(caplog.records) == 1
+
+
+def test_success_closes(breaker, clock):
+    breaker.failed(_RESOURCE, "missing")
+    breaker.failed(_RESOURCE, "missing")
+    breaker.succeeded(_RESOURCE)
+    assert breaker.allow(_RESOURCE)
+
+    breaker.failed(_RESOURCE, "missing")
+    clock.return_value += 5.0
+    assert breaker.allow(_RESOURCE)
+
+
+def test_reset_allows_probe(breaker):
+    breaker.failed(_RESOURCE, "missing")
+    breaker.reset(_RESOURCE)
+
+    assert breaker.allow(_RESOURCE)
+
+
+def test_resources_independent(breaker):
+    breaker.failed(_RESOURCE, "missing")
+
+    assert breaker.allow("other")
@@ -1,8 +1,21 @@
+import os
+import sqlite3
+from contextlib import closing
 from sqlite3 import OperationalError
 
 import pytest
 
-from twitch_db_client import db_select, get_cookie
+from twitch_db_client import (
+    close_connections, db_iter, db_select, DbChangeTracker, DbConnectionPool, DbMirror, get_cookie, get_cookies
+    , namedtuple_rows, sqlite_rows, TableDelta, tuple_rows
+)
+
+
+@pytest.fixture(autouse=True)
+def db_connections():
+    yield
+
+    close_connections()
 
 
 @pytest.fixture()
@@ -17,7 +30,7 @@ def db_connect_mock(db_path_mock, os_path_exists_mock, mocker):
     yield connect
 
     os_path_exists_mock.assert_called_once_with(db_path_mock)
-    connect.assert_called_once_with(f"file:{db_path_mock}?mode=ro", uri=True)
+    connect.assert_called_once_with(f"file:{db_path_mock}?mode=ro", uri=True, check_same_thread=False)
 
 
 @pytest.fixture()
@@ -40,12 +53,12 @@ def db_execute_mock(db_cursor_mock):
 
 
 @pytest.fixture()
-def db_query_fetchall(db_execute_mock):
-    db_query_fetchall = db_execute_mock.return_value.fetchall
+def db_query_fetchmany(db_execute_mock):
+    db_query_fetchmany = db_execute_mock.return_value.fetchmany
 
-    yield db_query_fetchall
+    yield db_query_fetchmany
 
-    db_query_fetchall.assert_called_once_with()
+    db_query_fetchmany.assert_called()
 
 
 def test_no_db(os_path_exists_mock, invalid_path):
@@ -55,6 +68,13 @@ def test_no_db(os_path_exists_mock, invalid_path):
     os_path_exists_mock.assert_called_once_with(invalid_path)
 
 
+def test_no_db_iter(os_path_exists_mock, invalid_path):
+    with pytest.raises(FileNotFoundError):
+        next(db_iter(db_path=invalid_path, query=""))
+
+    os_path_exists_mock.assert_called_once_with(invalid_path)
+
+
 def test_cannot_connect(db_connect_mock, db_path_mock):
     db_connect_mock.side_effect = OperationalError
 
@@ -76,9 +96,9 @@ def test_invalid_query(db_execute_mock, db_path_mock):
         db_select(db_path=db_path_mock, query="select-query")
 
 
-def test_select_query(db_cursor_mock, db_query_fetchall, db_path_mock):
+def test_select_query(db_cursor_mock, db_query_fetchmany, db_path_mock):
     db_cursor_mock.return_value.description = (("name",), ("value",))
-    db_query_fetchall.return_value = (("key1", "value1"), ("key2", "value2"),)
+    db_query_fetchmany.side_effect = [(("key1", "value1"), ("key2", "value2"),), ()]
 
     assert db_select(db_path=db_path_mock, query="select-query") == [
         {"name": "key1", "value": "value1"}
@@ -86,15 +106,240 @@ def test_select_query(db_cursor_mock, db_query_fetchall, db_path_mock):
     ]
 
 
-def test_failed_to_get_cookie(db_cursor_mock, db_query_fetchall, db_path_mock):
+def test_failed_to_get_cookie(db_cursor_mock, db_query_fetchmany, db_path_mock):
     db_cursor_mock.return_value.description = (("name",), ("value",))
-    db_query_fetchall.return_value = []
+    db_query_fetchmany.return_value = []
 
     assert get_cookie(db_path_mock, "cookie") is None
 
 
-def test_get_cookie(db_cursor_mock, db_query_fetchall, db_path_mock):
+def test_get_cookie(db_cursor_mock, db_query_fetchmany, db_path_mock):
     db_cursor_mock.return_value.description = (("name",), ("value",))
-    db_query_fetchall.return_value = (("cookie", "value"),)
+    db_query_fetchmany.side_effect = [(("cookie", "value"),), ()]
 
     assert get_cookie(db_path_mock, "cookie") == "value"
+
+
+def test_get_cookies(tmp_path):
+    db_path = str(tmp_path / "Cookies")
+    with closing(sqlite3.connect(db_path)) as db:
+        db.execute("create table cookies (name text, value text)")
+        db.executemany("insert into cookies values (?, ?)", [("a", "1"), ("b'--", "2"), ("c", "3")])
+        db.commit()
+
+    assert get_cookies(db_path, ["a", "b'--", "missing"]) == {"a": "1", "b'--": "2"}
+
+
+@pytest.fixture()
+def sqlite_db(tmp_path):
+    db_path = str(tmp_path / "test.sqlite")
+    with closing(sqlite3.connect(db_path)) as db:
+        db.execute("create table DbSet (Id text, Title text)")
+        db.commit()
+
+    return db_path
+
+
+@pytest.fixture()
+def db_change_tracker():
+    tracker = DbChangeTracker()
+
+    yield tracker
+
+    tracker.close()
+
+
+def test_missing_db_always_changed(db_change_tracker, tmp_path):
+    db_path = str(tmp_path / "missing.sqlite")
+
+    assert db_change_tracker.fingerprint(db_path) is None
+    assert db_change_tracker.has_changed(db_path)
+    assert db_change_tracker.has_changed(db_path)
+
+
+def test_db_not_changed(db_change_tracker, sqlite_db):
+    assert db_change_tracker.has_changed(sqlite_db)
+    assert not db_change_tracker.has_changed(sqlite_db)
+
+
+def test_db_changed(db_change_tracker, sqlite_db):
+    assert db_change_tracker.has_changed(sqlite_db)
+
+    with closing(sqlite3.connect(sqlite_db)) as db:
+        db.execute("insert into DbSet values ('id', 'title')")
+        db.commit()
+
+    assert db_change_tracker.has_changed(sqlite_db)
+    assert not db_change_tracker.has_changed(sqlite_db)
+
+
+def test_db_invalidated(db_change_tracker, sqlite_db):
+    assert db_change_tracker.has_changed(sqlite_db)
+
+    db_change_tracker.invalidate(sqlite_db)
+
+    assert db_change_tracker.has_changed(sqlite_db)
+
+
+@pytest.fixture()
+def db_pool():
+    pool = DbConnectionPool()
+
+    yield pool
+
+    pool.close()
+
+
+def test_pool_reuses_connection(db_pool, sqlite_db):
+    with db_pool.connection(sqlite_db) as db:
+        first = db
+
+    with db_pool.connection(sqlite_db) as db:
+        assert db is first
+        assert db.execute("pragma query_only").fetchone()[0] == 1
+
+
+def test_pool_reopens_replaced_db(db_pool, sqlite_db, tmp_path):
+    with db_pool.connection(sqlite_db) as db:
+        first = db
+
+    replacement = str(tmp_path / "replacement.sqlite")
+    with closing(sqlite3.connect(replacement)) as db:
+        db.execute("create table Other (Id text)")
+        db.commit()
+    os.replace(replacement, sqlite_db)
+
+    with db_pool.connection(sqlite_db) as db:
+        assert db is not first
+        assert db.execute("select count(*) from Other").fetchone()[0] == 0
+
+
+def test_pool_close(db_pool, sqlite_db):
+    with db_pool.connection(sqlite_db) as db:
+        first = db
+
+    db_pool.close()
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        first.execute("select 1")
+
+
+@pytest.fixture()
+def sqlite_db_with_rows(sqlite_db):
+    with closing(sqlite3.connect(sqlite_db)) as db:
+        db.executemany("insert into DbSet values (?, ?)", ((f"id-{idx}", f"title-{idx}") for idx in range(5)))
+        db.commit()
+
+    return sqlite_db
+
+
+@pytest.mark.parametrize("row_factory", [tuple_rows, namedtuple_rows, sqlite_rows])
+def test_db_iter(sqlite_db_with_rows, row_factory):
+    rows = db_iter(
+        sqlite_db_with_rows, "select Id, Title from DbSet order by Id", row_factory=row_factory, batch_size=2
+    )
+
+    assert [tuple(row) for row in rows] == [(f"id-{idx}", f"title-{idx}") for idx in range(5)]
+
+
+def test_db_iter_params(sqlite_db_with_rows):
+    rows = db_iter(sqlite_db_with_rows, "select Title from DbSet where Id = ?", params=("id-3",))
+
+    assert list(rows) == [("title-3",)]
+
+
+def test_db_iter_namedtuple(sqlite_db_with_rows):
+    row = next(db_iter(sqlite_db_with_rows, "select Id, Title from DbSet", row_factory=namedtuple_rows))
+
+    assert (row.Id, row.Title) == ("id-0", "title-0")
+
+
+@pytest.fixture()
+def db_mirror():
+    mirror = DbMirror("select Id as id, Title as title from {schema}.DbSet", busy_timeout=0.1)
+
+    yield mirror
+
+    mirror.close()
+
+
+def test_db_mirror_delta(db_mirror, sqlite_db_with_rows):
+    first = db_mirror.refresh(sqlite_db_with_rows)
+    assert first.complete
+    assert sorted(first.upserted) == [(f"id-{idx}", f"title-{idx}") for idx in range(5)]
+
+    with closing(sqlite3.connect(sqlite_db_with_rows)) as db:
+        db.execute("delete from DbSet where Id = 'id-0'")
+        db.execute("update DbSet set Title = 'renamed' where Id = 'id-1'")
+        db.execute("insert into DbSet values ('id-5', 'title-5')")
+        db.commit()
+
+    assert db_mirror.refresh(sqlite_db_with_rows) == TableDelta(
+        upserted=[("id-1", "renamed"), ("id-5", "title-5")], removed=["id-0"]
+    )
+    assert db_mirror.refresh(sqlite_db_with_rows) == TableDelta(upserted=[], removed=[])
+
+
+def test_db_mirror_keeps_snapshot_on_failure(db_mirror, sqlite_db_with_rows):
+    db_mirror.refresh(sqlite_db_with_rows)
+    with closing(sqlite3.connect(sqlite_db_with_rows)) as db:
+        db.execute("delete from DbSet where Id = 'id-0'")
+        db.commit()
+
+    with closing(sqlite3.connect(sqlite_db_with_rows, timeout=0, isolation_level=None)) as db:
+        db.execute("begin exclusive")
+        with pytest.raises(OperationalError):
+            db_mirror.refresh(sqlite_db_with_rows)
+        db.execute("rollback")
+
+    assert db_mirror.refresh(sqlite_db_with_rows) == TableDelta(upserted=[], removed=["id-0"])
+
+
+def test_db_mirror_missing_db(db_mirror, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        db_mirror.refresh(str(tmp_path / "missing.sqlite"))
+
+
+def test_locked_db_retried(db_connect_mock, db_path_mock, mocker):
+    sleep_mock = mocker.patch("time.sleep")
+    result = mocker.MagicMock()
+    result.fetchmany.side_effect = [[("value",)], []]
+    execute = db_connect_mock.return_value.cursor.return_value.execute
+    execute.side_effect = [OperationalError("database is locked"), result]
+
+    assert list(db_iter(db_path_mock, "select value from cookies")) == [("value",)]
+    assert execute.call_count == 2
+    sleep_mock.assert_called_once()
+
+
+def test_locked_db_gives_up(sqlite_db_with_rows, mocker):
+    sleep_mock = mocker.patch("time.sleep")
+
+    with closing(sqlite3.connect(sqlite_db_with_rows, isolation_level=None)) as db:
+        db.execute("begin exclusive")
+        with pytest.raises(OperationalError, match="locked"):
+            list(db_iter(sqlite_db_with_rows, "select Id from DbSet"))
+        db.execute("rollback")
+
+    delays = [call.args[0] for call in sleep_mock.call_args_list]
+    assert len(delays) == 3
+    assert all(0.5 * 0.05 * 2 ** idx <= delay <= 1.5 * 0.05 * 2 ** idx for idx, delay in enumerate(delays))
+
+
+def test_other_errors_not_retried(db_cursor_mock, db_path_mock, mocker):
+    sleep_mock = mocker.patch("time.sleep")
+    db_cursor_mock.return_value.execute.side_effect = OperationalError("no such table: DbSet")
+
+    with pytest.raises(OperationalError):
+        list(db_iter(db_path_mock, "select Id from DbSet"))
+    sleep_mock.assert_not_called()
+
+
+def test_db_mirror_reset(db_mirror, sqlite_db_with_rows):
+    db_mirror.refresh(sqlite_db_with_rows)
+    db_mirror.reset()
+
+    delta = db_mirror.refresh(sqlite_db_with_rows)
+
+    assert delta.complete
+    assert len(delta.upserted) == 5
@@ -0,0 +1,91 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from twitch_fs_watcher import FsWatchService, PollingFsWatcher
+
+linux_only = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is linux only")
+
+
+@pytest.fixture()
+def watched_dir(tmp_path):
+    watched_dir = tmp_path / "Sql"
+    watched_dir.mkdir()
+    return watched_dir
+
+
+def _read_until(watcher, predicate, timeout=2.0):
+    changed = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and not predicate(changed):
+        changed.extend(watcher.read_events(0.1))
+    return changed
+
+
+@linux_only
+def test_inotify_events(watched_dir):
+    from twitch_fs_watcher import InotifyFsWatcher
+
+    watcher = InotifyFsWatcher([str(watched_dir)])
+    try:
+        assert watcher.read_events(0.05) == []
+
+        (watched_dir / "GameInstallInfo.sqlite-wal").write_bytes(b"data")
+
+        changed = _read_until(watcher, lambda changed: changed)
+        assert str(watched_dir / "GameInstallInfo.sqlite-wal") in changed
+    finally:
+        watcher.close()
+
+
+@linux_only
+def test_inotify_missing_directory(tmp_path):
+    from twitch_fs_watcher import InotifyFsWatcher
+
+    with pytest.raises(OSError):
+        InotifyFsWatcher([str(tmp_path / "missing")])
+
+
+def test_polling_events(watched_dir):
+    db_path = watched_dir / "GameProductInfo.sqlite"
+    db_path.write_bytes(b"data")
+    watcher = PollingFsWatcher([str(watched_dir)])
+    try:
+        assert watcher.read_events(0) == []
+
+        db_path.write_bytes(b"more data")
+
+        assert watcher.read_events(0) == [str(db_path)]
+    finally:
+        watcher.close()
+
+
+def test_service_debounces_bursts(watched_dir):
+    owned_db = watched_dir / "GameProductInfo.sqlite"
+    installed_db = watched_dir / "GameInstallInfo.sqlite"
+    notified = []
+    changed = threading.Event()
+
+    def on_change(refreshes):
+        notified.append(refreshes)
+        changed.set()
+
+    service = FsWatchService(
+        {str(owned_db): "owned_games", str(installed_db): "local_games"}
+        , on_change=on_change
+        , debounce=0.2
+    )
+    service.start()
+    try:
+        for idx in range(5):
+            (watched_dir / "GameProductInfo.sqlite-wal").write_bytes(b"x" * (idx + 1))
+            time.sleep(0.02)
+
+        assert changed.wait(timeout=5)
+        time.sleep(0.4)
+    finally:
+        service.stop()
+
+    assert notified == [{"owned_games"}]
@@ -0,0 +1,74 @@
+import json
+import os
+
+import pytest
+
+from twitch_game_manifest import GameManifestCache
+
+
+@pytest.fixture()
+def manifests():
+    return GameManifestCache()
+
+
+@pytest.fixture()
+def game_dir(tmp_path):
+    game_dir = tmp_path / "game"
+    game_dir.mkdir()
+    (game_dir / "fuel.json").write_text(json.dumps({"SchemaVersion": "2", "Main": {"Command": "bin\\Game.exe"}}))
+    return game_dir
+
+
+def test_executables(manifests, game_dir):
+    assert manifests.executables(str(game_dir)) == {
+        "/".join([str(game_dir).casefold().strip("/"), "bin", "game.exe"])
+    }
+
+
+@pytest.mark.parametrize("manifest", ["{", "[]", json.dumps({"Main": {}}), json.dumps({"Main": {"Command": 1}})])
+def test_invalid_manifest(manifests, game_dir, manifest):
+    (game_dir / "fuel.json").write_text(manifest)
+
+    assert manifests.executables(str(game_dir)) is None
+
+
+def test_missing_manifest(manifests, tmp_path):
+    assert manifests.executables(str(tmp_path)) is None
+
+
+def test_manifest_cached_by_mtime(manifests, game_dir, mocker):
+    manifests.executables(str(game_dir))
+    read_spy = mocker.spy(manifests, "_read")
+
+    manifests.executables(str(game_dir))
+    read_spy.assert_not_called()
+
+    (game_dir / "fuel.json").write_text(json.dumps({"Main": {"Command": "other.exe"}}))
+    os.utime(game_dir / "fuel.json", ns=(0, 1))
+    assert manifests.executables(str(game_dir)) == {"/".join([str(game_dir).casefold().strip("/"), "other.exe"])}
+    read_spy.assert_called_once()
+
+
+@pytest.mark.parametrize("binary_path, expected", [
+    ("bin/game.exe", ["game-id"])
+    , ("bin/GAME.EXE", ["game-id"])
+    , ("CrashReporter.exe", [])
+    , ("bin/launcher.exe", [])
+])
+def test_index_matches_declared_executables(manifests, game_dir, binary_path, expected):
+    index = manifests.index([(str(game_dir), "game-id")])
+
+    assert index.match(os.path.join(str(game_dir), binary_path)) == expected
+
+
+def test_index_falls_back_to_install_directory(manifests, game_dir, tmp_path):
+    index = manifests.index([(str(game_dir), "game-id"), (str(tmp_path / "other"), "other-id")])
+
+    assert index.match(str(tmp_path / "other" / "helper.exe")) == ["other-id"]
+
+
+def test_index_drops_uninstalled_manifests(manifests, game_dir):
+    manifests.index([(str(game_dir), "game-id")])
+    manifests.index([])
+
+    assert manifests._manifests == {}
@@ -0,0 +1,112 @@
+import json
+import os
+
+import pytest
+
+from twitch_install_size import InstallSizeCalculator
+
+
+@pytest.fixture()
+def calculator():
+    calculator = InstallSizeCalculator()
+
+    yield calculator
+
+    calculator.close()
+
+
+@pytest.fixture()
+def game_dir(tmp_path):
+    (tmp_path / "bin").mkdir()
+    (tmp_path / "data" / "paks").mkdir(parents=True)
+    (tmp_path / "game.exe").write_bytes(b"\0" * 10)
+    (tmp_path / "bin" / "engine.dll").write_bytes(b"\0" * 20)
+    (tmp_path / "data" / "paks" / "0.pak").write_bytes(b"\0" * 30)
+    return tmp_path
+
+
+def test_walk(calculator, game_dir):
+    assert calculator.walk(str(game_dir)) == 60
+
+
+def test_unchanged_directories_not_rescanned(calculator, game_dir, mocker):
+    calculator.walk(str(game_dir))
+
+    scandir_spy = mocker.spy(os, "scandir")
+    (game_dir / "data" / "paks" / "1.pak").write_bytes(b"\0" * 40)
+    os.utime(game_dir / "data" / "paks", ns=(0, 1))
+
+    assert calculator.walk(str(game_dir)) == 100
+    scandir_spy.assert_called_once_with(str(game_dir / "data" / "paks"))
+
+
+def test_removed_directory(calculator, game_dir):
+    calculator.walk(str(game_dir))
+
+    os.remove(game_dir / "data" / "paks" / "0.pak")
+    os.rmdir(game_dir / "data" / "paks")
+    os.utime(game_dir / "data", ns=(0, 1))
+
+    assert calculator.walk(str(game_dir)) == 30
+
+
+def test_missing_directory(calculator, tmp_path):
+    assert calculator.walk(str(tmp_path / "missing")) == 0
+
+
+@pytest.mark.asyncio
+async def test_get_size(calculator, game_dir):
+    assert await calculator.get_size(str(game_dir)) == 60
+
+
+@pytest.mark.asyncio
+async def test_get_size_failure(calculator, game_dir, mocker):
+    mocker.patch.object(calculator, "walk", side_effect=RuntimeError)
+
+    assert await calculator.get_size(str(game_dir)) is None
+
+
+@pytest.fixture()
+def cache_path(tmp_path_factory):
+    return str(tmp_path_factory.mktemp("plugin-data") / "twitch" / "install_sizes.json")
+
+
+def test_cache_persisted(game_dir, cache_path, mocker):
+    calculator = InstallSizeCalculator(cache_path)
+    calculator.walk(str(game_dir))
+    calculator.save()
+    calculator.close()
+
+    restored = InstallSizeCalculator(cache_path)
+    scandir_spy = mocker.spy(os, "scandir")
+
+    assert restored.walk(str(game_dir)) == 60
+    scandir_spy.assert_not_called()
+    restored.close()
+
+
+def test_cache_drops_unvisited_directories(game_dir, tmp_path_factory, cache_path):
+    other_dir = tmp_path_factory.mktemp("other")
+    calculator = InstallSizeCalculator(cache_path)
+    calculator.walk(str(game_dir))
+    calculator.walk(str(other_dir))
+    calculator.save()
+    calculator.close()
+
+    restored = InstallSizeCalculator(cache_path)
+    restored.walk(str(other_dir))
+    restored.save()
+    restored.close()
+
+    with open(cache_path) as cache_file:
+        assert [directory[0] for directory in json.load(cache_file)["directories"]] == [str(other_dir)]
+
+
+def test_corrupted_cache(game_dir, cache_path):
+    os.makedirs(os.path.dirname(cache_path))
+    with open(cache_path, "w") as cache_file:
+        cache_file.write("{")
+    calculator = InstallSizeCalculator(cache_path)
+
+    assert calculator.walk(str(game_dir)) == 60
+    calculator.close()
@@ -0,0 +1,253 @@
+import threading
+from unittest.mock import PropertyMock
+
+import pytest
+from galaxy.unittest.mock import AsyncMock
+
+from twitch_launcher_client import LauncherLocation, LauncherNotReadyError, TwitchLauncherClient
+from twitch_registry import HKEY_CURRENT_USER, HKEY_LOCAL_MACHINE, MemoryRegistry
+
+_UNINSTALL_KEY = TwitchLauncherClient._UNINSTALL_KEY
+_INSTALL_PATH = "c:/program files/twitch"
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture()
+def clock():
+    return _Clock()
+
+
+@pytest.fixture()
+def registry():
+    registry = MemoryRegistry()
+    for idx in range(100):
+        registry.set_values(HKEY_LOCAL_MACHINE, f"{_UNINSTALL_KEY}\\app-{idx}", {"DisplayName": f"App {idx}"})
+    return registry
+
+
+@pytest.fixture()
+def launcher_client(registry, clock):
+    return TwitchLauncherClient(registry=registry, clock=clock)
+
+
+@pytest.fixture()
+def install_path_exists(mocker):
+    return mocker.patch("os.path.exists", side_effect=lambda path: path == _INSTALL_PATH)
+
+
+def _install_launcher(registry, subkey):
+    registry.set_values(
+        HKEY_LOCAL_MACHINE, f"{_UNINSTALL_KEY}\\{subkey}", {"DisplayName": "Twitch", "InstallLocation": _INSTALL_PATH}
+    )
+
+
+def test_install_path_found_by_enumeration(launcher_client, registry, install_path_exists):
+    _install_launcher(registry, "{5c3c4a6b-0000}")
+
+    launcher_client.update_install_path()
+
+    assert launcher_client.cookies_db_path.startswith(_INSTALL_PATH)
+    assert launcher_client._location == LauncherLocation(HKEY_LOCAL_MACHINE, "{5c3c4a6b-0000}", _INSTALL_PATH)
+
+
+def test_cached_location_skips_enumeration(launcher_client, registry, install_path_exists, mocker):
+    _install_launcher(registry, "{5c3c4a6b-0000}")
+    launcher_client.update_install_path()
+    location_cache = launcher_client.location_cache
+
+    restored_client = TwitchLauncherClient(registry=registry)
+    restored_client.restore_location_cache(location_cache)
+    subkeys_spy = mocker.spy(registry, "subkeys")
+    restored_client.update_install_path()
+
+    assert restored_client._launcher_install_path == _INSTALL_PATH
+    subkeys_spy.assert_not_called()
+
+
+def test_direct_key_skips_enumeration(launcher_client, registry, install_path_exists, mocker):
+    _install_launcher(registry, "Twitch")
+    subkeys_spy = mocker.spy(registry, "subkeys")
+
+    launcher_client.update_install_path()
+
+    assert launcher_client._launcher_install_path == _INSTALL_PATH
+    subkeys_spy.assert_not_called()
+
+
+def test_missing_launcher_backoff(launcher_client, registry, clock, install_path_exists, mocker):
+    values_spy = mocker.spy(registry, "values")
+
+    launcher_client.update_install_path()
+    lookups = values_spy.call_count
+    assert lookups > 0
+
+    launcher_client.update_install_path()
+    assert values_spy.call_count == lookups
+
+    clock.now += TwitchLauncherClient._LOOKUP_BACKOFF_MIN
+    launcher_client.update_install_path()
+    assert values_spy.call_count == 2 * lookups
+
+    clock.now += TwitchLauncherClient._LOOKUP_BACKOFF_MIN
+    launcher_client.update_install_path()
+    assert values_spy.call_count == 2 * lookups
+
+    _install_launcher(registry, "{5c3c4a6b-0000}")
+    clock.now += TwitchLauncherClient._LOOKUP_BACKOFF_MIN
+    launcher_client.update_install_path()
+    assert launcher_client._launcher_install_path == _INSTALL_PATH
+
+
+def test_stale_install_location_ignored(launcher_client, registry, mocker):
+    mocker.patch("os.path.exists", return_value=False)
+    _install_launcher(registry, "Twitch")
+
+    launcher_client.update_install_path()
+
+    assert launcher_client._launcher_install_path is None
+
+
+def test_missing_uninstall_key(clock, install_path_exists):
+    registry = MemoryRegistry()
+    registry.set_values(HKEY_CURRENT_USER, "Software\\Other", {})
+    launcher_client = TwitchLauncherClient(registry=registry, clock=clock)
+
+    launcher_client.update_install_path()
+
+    assert launcher_client._launcher_install_path is None
+
+
+@pytest.mark.parametrize("location_cache", ["", "not json", '{"root": "HKLM"}'])
+def test_invalid_location_cache(launcher_client, location_cache):
+    launcher_client.restore_location_cache(location_cache)
+
+    assert launcher_client.location_cache is None
+
+
+@pytest.fixture()
+def launcher_process_mock(launcher_client, mocker):
+    mocker.patch.object(launcher_client, "_exec")
+    mocker.patch.object(launcher_client, "_hide_launcher", return_value=True)
+    window_mock = mocker.patch.object(TwitchLauncherClient, "_is_launcher_running", new_callable=PropertyMock)
+    agent_mock = mocker.patch.object(TwitchLauncherClient, "_is_launcher_agent_running", new_callable=AsyncMock)
+    window_mock.return_value = False
+    agent_mock.return_value = False
+    return window_mock, agent_mock
+
+
+@pytest.mark.asyncio
+async def test_start_launcher_waits_for_window_only(launcher_client, launcher_process_mock, mocker):
+    window_mock, agent_mock = launcher_process_mock
+    window_mock.side_effect = [False, False, False, True]
+    sleep_mock = mocker.patch("asyncio.sleep", new_callable=AsyncMock)
+
+    await launcher_client.start_launcher()
+
+    launcher_client._exec.assert_called_once()
+    launcher_client._hide_launcher.assert_called_once()
+    agent_mock.assert_not_called()
+    assert [call.args[0] for call in sleep_mock.call_args_list] == [0.05, 0.1]
+
+
+@pytest.mark.asyncio
+async def test_start_launcher_timeout(launcher_client, launcher_process_mock, mocker):
+    mocker.patch.object(TwitchLauncherClient, "_READY_TIMEOUT", 0.05)
+    mocker.patch.object(TwitchLauncherClient, "_READY_POLL_MIN", 0.01)
+
+    with pytest.raises(LauncherNotReadyError):
+        await launcher_client.start_launcher()
+
+
+@pytest.fixture()
+def open_tab_mock(mocker):
+    return mocker.patch("webbrowser.open_new_tab")
+
+
+@pytest.mark.asyncio
+async def test_launch_game_waits_for_agent(launcher_client, launcher_process_mock, open_tab_mock, mocker):
+    window_mock, agent_mock = launcher_process_mock
+    window_mock.side_effect = [False, False, True, True]
+    agent_mock.side_effect = [False, False, True]
+    sleep_mock = mocker.patch("asyncio.sleep", new_callable=AsyncMock)
+
+    await launcher_client.launch_game("game-id")
+
+    launcher_client._exec.assert_called_once()
+    assert [call.args[0] for call in sleep_mock.call_args_list] == [0.05, 0.1]
+    open_tab_mock.assert_called_once_with("twitch://fuel-launch/game-id")
+
+
+@pytest.mark.asyncio
+async def test_launch_game_ready_on_cookies_update(launcher_client, launcher_process_mock, open_tab_mock, mocker):
+    window_mock, _ = launcher_process_mock
+    window_mock.side_effect = [False, True]
+    mocker.patch.object(launcher_client, "_cookies_stat", side_effect=[None, (1, 1)])
+
+    await launcher_client.launch_game("game-id")
+
+    launcher_client._hide_launcher.assert_called_once()
+    open_tab_mock.assert_called_once_with("twitch://fuel-launch/game-id")
+
+
+@pytest.mark.asyncio
+async def test_launch_game_ignores_agent_already_running(
+    launcher_client
+    , launcher_process_mock
+    , open_tab_mock
+    , mocker
+):
+    window_mock, agent_mock = launcher_process_mock
+    window_mock.side_effect = [False, True, True]
+    agent_mock.return_value = True
+    mocker.patch.object(launcher_client, "_cookies_stat", side_effect=[None, None, (1, 1)])
+    sleep_mock = mocker.patch("asyncio.sleep", new_callable=AsyncMock)
+
+    await launcher_client.launch_game("game-id")
+
+    sleep_mock.assert_called_once_with(0.05)
+    open_tab_mock.assert_called_once_with("twitch://fuel-launch/game-id")
+
+
+@pytest.mark.asyncio
+async def test_launch_game_timeout(launcher_client, launcher_process_mock, open_tab_mock, mocker):
+    window_mock, _ = launcher_process_mock
+    window_mock.side_effect = [False] + [True] * 100
+    mocker.patch.object(TwitchLauncherClient, "_READY_TIMEOUT", 0.05)
+    mocker.patch.object(TwitchLauncherClient, "_READY_POLL_MIN", 0.01)
+
+    with pytest.raises(LauncherNotReadyError):
+        await launcher_client.launch_game("game-id")
+
+    open_tab_mock.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_launch_game_without_fixed_delay(launcher_client, launcher_process_mock, open_tab_mock, mocker):
+    window_mock, agent_mock = launcher_process_mock
+    window_mock.side_effect = [False, False, True]
+    agent_mock.side_effect = [False, True]
+    sleep_mock = mocker.patch("asyncio.sleep", new_callable=AsyncMock)
+
+    await launcher_client.launch_game("game-id")
+
+    sleep_mock.assert_called_once_with(0.05)
+    open_tab_mock.assert_called_once_with("twitch://fuel-launch/game-id")
+
+
+@pytest.mark.asyncio
+async def test_agent_check_scans_off_loop(launcher_client, mocker):
+    threads = []
+    mocker.patch.object(
+        launcher_client._processes, "update", side_effect=lambda *_: threads.append(threading.current_thread())
+    )
+    mocker.patch.object(launcher_client._processes, "is_running", return_value=True)
+
+    assert await launcher_client._is_launcher_agent_running()
+    assert threads and threading.current_thread() not in threads
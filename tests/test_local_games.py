@@ -1,5 +1,8 @@
+import asyncio
+import time
+
 import pytest
-from galaxy.api.types import LocalGame, LocalGameState
+from galaxy.api.types import GameTime, LocalGame, LocalGameState
 from galaxy.proc_tools import ProcessId, ProcessInfo
 
 _GAME_ID = "game-id"
@@ -17,22 +20,13 @@ _PROCESS_LIST_GAME_RUNNING = [
 
 
 def _db_installed_game(asin: str, is_installed: bool, install_path: str):
-    return {
-        "Id": asin
-        , "Installed": int(is_installed)
-        , "InstallDirectory": install_path
-    }
+    return asin, int(is_installed), install_path
 
 
 def _installed_game(game_id):
     return LocalGame(game_id, LocalGameState.Installed)
 
 
-@pytest.fixture()
-def process_iter_mock(mocker):
-    return mocker.patch("twitch_plugin.process_iter")
-
-
 @pytest.fixture()
 def get_owned_games_mock(mocker):
     return mocker.patch("twitch_plugin.TwitchPlugin._get_owned_games", return_value={})
@@ -62,21 +56,21 @@ async def test_installed_games(
     , owned_games
     , running_processes
     , installed_twitch_plugin
-    , db_select_mock
+    , db_iter_mock
     , os_path_exists_mock
-    , process_iter_mock
+    , running_processes_mock
     , get_owned_games_mock
 ):
-    db_select_mock.side_effect = [db_response]
-    process_iter_mock.side_effect = [running_processes]
+    db_iter_mock.side_effect = [db_response]
+    running_processes_mock(running_processes)
 
     installed_twitch_plugin.handshake_complete()
 
     assert owned_games == await installed_twitch_plugin.get_local_games()
 
-    db_select_mock.assert_called_once()
+    db_iter_mock.assert_called_once()
     if running_processes is not None:
-        process_iter_mock.assert_called()
+        running_processes_mock.pids.assert_called()
 
 
 @pytest.mark.asyncio
@@ -186,11 +180,12 @@ async def test_uninstall_game(installed_twitch_plugin, twitch_launcher_mock) ->
         , []
         , LocalGame("game-id", LocalGameState.None_)
     )
+    # failed read -> last known state
     , (
         _db_installed_game("game-id", True, _INSTALL_PATH)
         , None
         , []
-        , LocalGame("game-id", LocalGameState.None_)
+        , None
     )
 ])
 async def test_local_game_update(
@@ -199,27 +194,220 @@ async def test_local_game_update(
     , running_processes
     , expected_call
     , installed_twitch_plugin
-    , db_select_mock
-    , process_iter_mock
+    , db_iter_mock
+    , running_processes_mock
     , get_owned_games_mock
     , mocker
 ):
     # prepare
-    db_select_mock.return_value = [old_game_state]
+    db_iter_mock.return_value = [old_game_state]
     update_local_game_status_mock = mocker.patch("twitch_plugin.TwitchPlugin.update_local_game_status")
-    process_iter_mock.side_effect = [running_processes]
+    running_processes_mock(running_processes)
 
     installed_twitch_plugin.handshake_complete()
-    assert db_select_mock.call_count == 1
+    assert db_iter_mock.call_count == 1
 
     # test
-    db_select_mock.return_value = [new_game_state]
-    process_iter_mock.side_effect = [running_processes]
+    db_iter_mock.return_value = [new_game_state]
+    running_processes_mock(running_processes)
 
     installed_twitch_plugin.tick()
-    assert db_select_mock.call_count == 2
+    await installed_twitch_plugin._refresh_task
+    assert db_iter_mock.call_count == 2
 
     if expected_call is None:
         update_local_game_status_mock.assert_not_called()
     else:
         update_local_game_status_mock.assert_called_once_with(expected_call)
+
+
+@pytest.mark.asyncio
+async def test_sibling_directory_not_running(
+    installed_twitch_plugin
+    , db_iter_mock
+    , running_processes_mock
+    , get_owned_games_mock
+):
+    db_iter_mock.return_value = [_db_installed_game(_GAME_ID, True, _INSTALL_PATH)]
+    running_processes_mock([ProcessInfo(ProcessId(666), f"{_INSTALL_PATH}-sibling/game.exe")])
+
+    installed_twitch_plugin.handshake_complete()
+
+    assert [_installed_game(_GAME_ID)] == await installed_twitch_plugin.get_local_games()
+
+
+@pytest.mark.asyncio
+async def test_local_size(installed_twitch_plugin, db_iter_mock, running_processes_mock, get_owned_games_mock, mocker):
+    db_iter_mock.side_effect = [[_db_installed_game(_GAME_ID, True, _INSTALL_PATH)]]
+    running_processes_mock([])
+    walk_mock = mocker.patch("twitch_install_size.InstallSizeCalculator.walk", return_value=1024)
+
+    installed_twitch_plugin.handshake_complete()
+    context = await installed_twitch_plugin.prepare_local_size_context([_GAME_ID, "other-game"])
+
+    assert await installed_twitch_plugin.get_local_size(_GAME_ID, context) == 1024
+    assert await installed_twitch_plugin.get_local_size("other-game", context) == 0
+    walk_mock.assert_called_once_with(_INSTALL_PATH)
+
+
+@pytest.mark.asyncio
+async def test_local_size_context_filtered(
+    installed_twitch_plugin
+    , db_iter_mock
+    , running_processes_mock
+    , get_owned_games_mock
+):
+    db_iter_mock.side_effect = [[
+        _db_installed_game(_GAME_ID, True, _INSTALL_PATH)
+        , _db_installed_game("other-game", True, "x:/games/other-game")
+    ]]
+    running_processes_mock([])
+
+    installed_twitch_plugin.handshake_complete()
+
+    assert await installed_twitch_plugin.prepare_local_size_context([_GAME_ID]) == {_GAME_ID: _INSTALL_PATH}
+
+
+@pytest.mark.asyncio
+async def test_game_time(installed_twitch_plugin, db_iter_mock, running_processes_mock, get_owned_games_mock, mocker):
+    time_mock = mocker.patch("time.time", return_value=1000.0)
+    installed_twitch_plugin._playtime._clock = time_mock
+    db_iter_mock.side_effect = [[_db_installed_game(_GAME_ID, True, _INSTALL_PATH)]]
+    running_processes_mock(_PROCESS_LIST_GAME_RUNNING)
+
+    installed_twitch_plugin.handshake_complete()
+
+    time_mock.return_value = 1300.0
+    context = await installed_twitch_plugin.prepare_game_times_context([_GAME_ID])
+    assert await installed_twitch_plugin.get_game_time(_GAME_ID, context) == GameTime(_GAME_ID, 5, 1300)
+
+
+def test_process_snapshot_shared_with_launcher(twitch_plugin_mock):
+    assert twitch_plugin_mock._launcher_client._processes is twitch_plugin_mock._processes
+
+
+@pytest.mark.asyncio
+async def test_helper_binary_not_running(
+    installed_twitch_plugin
+    , db_iter_mock
+    , running_processes_mock
+    , get_owned_games_mock
+    , mocker
+):
+    mocker.patch(
+        "twitch_game_manifest.GameManifestCache.executables"
+        , return_value=frozenset(["x:/games/game-id/bin/game.exe"])
+    )
+    db_iter_mock.return_value = [_db_installed_game(_GAME_ID, True, _INSTALL_PATH)]
+    running_processes_mock([ProcessInfo(ProcessId(666), _GAME_BIN_PATH)])
+
+    installed_twitch_plugin.handshake_complete()
+    assert [_installed_game(_GAME_ID)] == await installed_twitch_plugin.get_local_games()
+
+    running_processes_mock([ProcessInfo(ProcessId(667), "X:\\Games\\game-id\\bin\\Game.exe")])
+    installed_twitch_plugin._local_games_refresh_requested = True
+    installed_twitch_plugin._start_refresh()
+    await installed_twitch_plugin._refresh_task
+
+    assert [
+        LocalGame(_GAME_ID, LocalGameState.Installed | LocalGameState.Running)
+    ] == await installed_twitch_plugin.get_local_games()
+
+
+@pytest.mark.asyncio
+async def test_game_exit_reported_without_scan(
+    installed_twitch_plugin
+    , db_iter_mock
+    , running_processes_mock
+    , get_owned_games_mock
+    , mocker
+):
+    db_iter_mock.return_value = [_db_installed_game(_GAME_ID, True, _INSTALL_PATH)]
+    running_processes_mock(_PROCESS_LIST_GAME_RUNNING)
+    watch_mock = mocker.patch("twitch_process_watcher.ProcessExitWatcher.watch")
+    update_local_game_status_mock = mocker.patch("twitch_plugin.TwitchPlugin.update_local_game_status")
+
+    installed_twitch_plugin.handshake_complete()
+    watch_mock.assert_called_with({ProcessId(666)})
+
+    installed_twitch_plugin._on_game_process_exited(ProcessId(666))
+    await asyncio.sleep(0)
+
+    update_local_game_status_mock.assert_called_once_with(_installed_game(_GAME_ID))
+    assert [_installed_game(_GAME_ID)] == await installed_twitch_plugin.get_local_games()
+
+    # a scan taken before the exit doesn't bring the game back to running
+    installed_twitch_plugin._local_games_refresh_requested = True
+    installed_twitch_plugin._start_refresh()
+    await installed_twitch_plugin._refresh_task
+
+    assert [_installed_game(_GAME_ID)] == await installed_twitch_plugin.get_local_games()
+
+
+@pytest.mark.asyncio
+async def test_game_exit_during_refresh(
+    installed_twitch_plugin
+    , db_iter_mock
+    , running_processes_mock
+    , get_owned_games_mock
+    , mocker
+):
+    db_iter_mock.return_value = [_db_installed_game(_GAME_ID, True, _INSTALL_PATH)]
+    running_processes_mock(_PROCESS_LIST_GAME_RUNNING)
+    mocker.patch("twitch_process_watcher.ProcessExitWatcher.watch")
+    installed_twitch_plugin.handshake_complete()
+
+    get_local_games = installed_twitch_plugin._get_local_games
+    loop = asyncio.get_event_loop()
+
+    def exit_during_refresh():
+        local_games = get_local_games()
+        loop.call_soon_threadsafe(
+            installed_twitch_plugin._on_game_process_exited, ProcessId(666)
+        )
+        time.sleep(0.05)
+        return local_games
+
+    mocker.patch.object(installed_twitch_plugin, "_get_local_games", side_effect=exit_during_refresh)
+    installed_twitch_plugin._local_games_refresh_requested = True
+    installed_twitch_plugin._start_refresh()
+    await installed_twitch_plugin._refresh_task
+
+    assert [_installed_game(_GAME_ID)] == await installed_twitch_plugin.get_local_games()
+
+
+@pytest.mark.asyncio
+async def test_running_games_kept_during_index_rebuild(
+    installed_twitch_plugin
+    , db_iter_mock
+    , running_processes_mock
+    , get_owned_games_mock
+    , mocker
+):
+    db_iter_mock.return_value = [_db_installed_game(_GAME_ID, True, _INSTALL_PATH)]
+    running_processes_mock(_PROCESS_LIST_GAME_RUNNING)
+    installed_twitch_plugin.handshake_complete()
+    await installed_twitch_plugin.get_local_games()
+
+    game_executables = installed_twitch_plugin._game_executables
+    match = game_executables.match
+    seen_running = []
+
+    def match_during_rebuild(binary_path):
+        seen_running.append(installed_twitch_plugin._running_game_ids())
+        return match(binary_path)
+
+    mocker.patch.object(game_executables, "match", side_effect=match_during_rebuild)
+    installed_twitch_plugin._game_processes_index = None
+
+    assert {_GAME_ID} == installed_twitch_plugin._get_running_games()
+    assert seen_running and all(running == {_GAME_ID} for running in seen_running)
+
+
+def test_local_size_cache_saved_after_import(twitch_plugin_mock, mocker):
+    save_mock = mocker.patch("twitch_install_size.InstallSizeCalculator.save")
+
+    twitch_plugin_mock.local_size_import_complete()
+    twitch_plugin_mock._refresh_executor.shutdown(wait=True)
+
+    save_mock.assert_called_once_with()
@@ -0,0 +1,121 @@
+import asyncio
+from unittest.mock import call, MagicMock
+
+import pytest
+from galaxy.api.consts import LicenseType, LocalGameState
+from galaxy.api.types import Game, LicenseInfo, LocalGame
+from galaxy.unittest.mock import AsyncMock
+
+from twitch_notifications import NotificationQueue
+
+
+def _game(game_id, title="title"):
+    return Game(game_id, title, None, LicenseInfo(LicenseType.SinglePurchase))
+
+
+@pytest.fixture()
+def plugin_mock():
+    return MagicMock()
+
+
+@pytest.fixture()
+def drain_mock():
+    return AsyncMock()
+
+
+@pytest.fixture()
+def notifications(plugin_mock, drain_mock):
+    return NotificationQueue(plugin_mock, drain=drain_mock, batch_size=2)
+
+
+@pytest.mark.asyncio
+async def test_added_and_removed_collapsed(notifications, plugin_mock):
+    notifications.add_game(_game("game-id"))
+    notifications.remove_game("game-id")
+
+    assert len(notifications) == 0
+    await notifications.flush()
+
+    plugin_mock.add_game.assert_not_called()
+    plugin_mock.remove_game.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_removed_and_added_sent_as_update(notifications, plugin_mock):
+    notifications.remove_game("game-id")
+    notifications.add_game(_game("game-id", "new title"))
+
+    await notifications.flush()
+
+    plugin_mock.update_game.assert_called_once_with(_game("game-id", "new title"))
+    plugin_mock.remove_game.assert_not_called()
+    plugin_mock.add_game.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_added_and_updated_sent_as_add(notifications, plugin_mock):
+    notifications.add_game(_game("game-id"))
+    notifications.update_game(_game("game-id", "new title"))
+
+    await notifications.flush()
+
+    plugin_mock.add_game.assert_called_once_with(_game("game-id", "new title"))
+    plugin_mock.update_game.assert_not_called()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("states, expected_calls", [
+    ([LocalGameState.Installed | LocalGameState.Running], [LocalGameState.Installed | LocalGameState.Running])
+    , (
+        [LocalGameState.Installed | LocalGameState.Running, LocalGameState.None_]
+        , [LocalGameState.None_]
+    )
+    , ([LocalGameState.Installed | LocalGameState.Running, LocalGameState.Installed], [])
+])
+async def test_local_game_state_flips_collapsed(states, expected_calls, notifications, plugin_mock):
+    previous_state = LocalGameState.Installed
+    for state in states:
+        notifications.update_local_game_status(LocalGame("game-id", state), previous_state)
+        previous_state = state
+
+    await notifications.flush()
+
+    assert plugin_mock.update_local_game_status.call_args_list == [
+        call(LocalGame("game-id", state)) for state in expected_calls
+    ]
+
+
+@pytest.mark.asyncio
+async def test_flushed_in_batches(notifications, plugin_mock, drain_mock):
+    for idx in range(5):
+        notifications.add_game(_game(f"game-{idx}"))
+
+    await notifications.flush()
+
+    assert plugin_mock.add_game.call_count == 5
+    assert drain_mock.call_count == 3
+    assert len(notifications) == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_flushes_drain_in_turn(plugin_mock):
+    draining = []
+    drained = []
+
+    async def drain():
+        assert not draining
+        draining.append(True)
+        await asyncio.sleep(0.01)
+        draining.pop()
+        drained.append(True)
+
+    notifications = NotificationQueue(plugin_mock, drain=drain)
+    notifications.add_game(_game("game-1"))
+    first_flush = asyncio.ensure_future(notifications.flush())
+    await asyncio.sleep(0)
+    notifications.add_game(_game("game-2"))
+
+    await asyncio.gather(first_flush, notifications.flush())
+
+    assert plugin_mock.add_game.call_count == 2
+    assert len(drained) == 2
@@ -1,13 +1,19 @@
+import os
+import sqlite3
+from contextlib import closing
+from sqlite3 import OperationalError
+from unittest.mock import PropertyMock
+
 import pytest
 from galaxy.api.consts import LicenseType
 from galaxy.api.types import Game, LicenseInfo
 
+from twitch_db_client import DbMirror
+from twitch_plugin import _OWNED_GAMES_PROJECTION
+
 
 def _db_owned_game(game_id, title):
-    return {
-        "ProductIdStr": game_id
-        , "ProductTitle": title
-    }
+    return game_id, title
 
 
 def _owned_game(game_id, game_title):
@@ -39,16 +45,16 @@ async def test_owned_games(
     db_response
     , owned_games
     , installed_twitch_plugin
-    , db_select_mock
+    , db_iter_mock
     , get_local_games_mock
 ):
-    db_select_mock.side_effect = [db_response]
+    db_iter_mock.side_effect = [db_response]
 
     installed_twitch_plugin.handshake_complete()
 
     assert await installed_twitch_plugin.get_owned_games() == owned_games
 
-    db_select_mock.assert_called_once()
+    db_iter_mock.assert_called_once()
 
 
 _GAME_ID = "game-id"
@@ -67,6 +73,12 @@ _GAME_TITLE = "game title"
         , [_db_owned_game(_GAME_ID, _GAME_TITLE)]
         , []
     )
+    # owned -> renamed
+    , (
+        [_db_owned_game(_GAME_ID, "old title")]
+        , [_db_owned_game(_GAME_ID, _GAME_TITLE)]
+        , ["update"]
+    )
     # owned -> not owned
     , ([_db_owned_game(_GAME_ID, _GAME_TITLE)], [], ["remove"])
 ])
@@ -75,23 +87,25 @@ async def test_owned_game_update(
     , new_game_state
     , expected_calls
     , installed_twitch_plugin
-    , db_select_mock
+    , db_iter_mock
     , get_local_games_mock
     , mocker
 ):
     # prepare
-    db_select_mock.return_value = old_game_state
+    db_iter_mock.return_value = old_game_state
     game_added_mock = mocker.patch("twitch_plugin.TwitchPlugin.add_game")
     game_removed_mock = mocker.patch("twitch_plugin.TwitchPlugin.remove_game")
+    game_updated_mock = mocker.patch("twitch_plugin.TwitchPlugin.update_game")
 
     installed_twitch_plugin.handshake_complete()
-    assert db_select_mock.call_count == 1
+    assert db_iter_mock.call_count == 1
 
     # test
-    db_select_mock.return_value = new_game_state
+    db_iter_mock.return_value = new_game_state
 
     installed_twitch_plugin.tick()
-    assert db_select_mock.call_count == 2
+    await installed_twitch_plugin._refresh_task
+    assert db_iter_mock.call_count == 2
 
     if "add" in expected_calls:
         game_added_mock.assert_called_once_with(_owned_game(_GAME_ID, _GAME_TITLE))
@@ -102,3 +116,182 @@ async def test_owned_game_update(
         game_removed_mock.assert_called_once_with(_GAME_ID)
     else:
         game_removed_mock.assert_not_called()
+
+    if "update" in expected_calls:
+        game_updated_mock.assert_called_once_with(_owned_game(_GAME_ID, _GAME_TITLE))
+    else:
+        game_updated_mock.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_unchanged_games_reused(installed_twitch_plugin, db_iter_mock, get_local_games_mock):
+    db_iter_mock.return_value = [_db_owned_game(_GAME_ID, _GAME_TITLE), _db_owned_game("other-id", "other")]
+    installed_twitch_plugin.handshake_complete()
+    owned_games_cache = installed_twitch_plugin._owned_games_cache
+
+    db_iter_mock.return_value = [_db_owned_game(_GAME_ID, _GAME_TITLE), _db_owned_game("other-id", "renamed")]
+    installed_twitch_plugin.tick()
+    await installed_twitch_plugin._refresh_task
+
+    assert installed_twitch_plugin._owned_games_cache[_GAME_ID] is owned_games_cache[_GAME_ID]
+    assert installed_twitch_plugin._owned_games_cache["other-id"] is not owned_games_cache["other-id"]
+
+
+@pytest.mark.asyncio
+async def test_owned_games_db_not_changed(
+    installed_twitch_plugin
+    , db_iter_mock
+    , get_local_games_mock
+    , mocker
+):
+    db_iter_mock.return_value = [_db_owned_game(_GAME_ID, _GAME_TITLE)]
+    has_changed_mock = mocker.patch("twitch_plugin.DbChangeTracker.has_changed", return_value=True)
+    game_added_mock = mocker.patch("twitch_plugin.TwitchPlugin.add_game")
+
+    installed_twitch_plugin.handshake_complete()
+
+    has_changed_mock.return_value = False
+    db_iter_mock.return_value = []
+
+    installed_twitch_plugin.tick()
+    await installed_twitch_plugin._refresh_task
+
+    assert db_iter_mock.call_count == 1
+    assert await installed_twitch_plugin.get_owned_games() == [_owned_game(_GAME_ID, _GAME_TITLE)]
+    game_added_mock.assert_not_called()
+
+
+@pytest.fixture()
+def owned_games_db(tmp_path, installed_twitch_plugin, mocker):
+    db_path = str(tmp_path / "GameProductInfo.sqlite")
+    with closing(sqlite3.connect(db_path)) as db:
+        db.execute("create table DbSet (ProductIdStr text, ProductTitle text)")
+        db.executemany("insert into DbSet values (?, ?)", [(_GAME_ID, _GAME_TITLE), ("other-id", "other")])
+        db.commit()
+
+    mocker.patch("twitch_plugin.TwitchPlugin._db_owned_games", new_callable=PropertyMock, return_value=db_path)
+    installed_twitch_plugin._owned_games_mirror = DbMirror(_OWNED_GAMES_PROJECTION)
+    return db_path
+
+
+@pytest.mark.asyncio
+async def test_owned_games_mirror(installed_twitch_plugin, owned_games_db, get_local_games_mock, mocker):
+    game_removed_mock = mocker.patch("twitch_plugin.TwitchPlugin.remove_game")
+    game_updated_mock = mocker.patch("twitch_plugin.TwitchPlugin.update_game")
+    installed_twitch_plugin.handshake_complete()
+    assert await installed_twitch_plugin.get_owned_games() == [
+        _owned_game(_GAME_ID, _GAME_TITLE), _owned_game("other-id", "other")
+    ]
+
+    with closing(sqlite3.connect(owned_games_db)) as db:
+        db.execute("update DbSet set ProductTitle = 'renamed' where ProductIdStr = ?", (_GAME_ID,))
+        db.execute("delete from DbSet where ProductIdStr = 'other-id'")
+        db.commit()
+
+    installed_twitch_plugin.tick()
+    await installed_twitch_plugin._refresh_task
+
+    game_updated_mock.assert_called_once_with(_owned_game(_GAME_ID, "renamed"))
+    game_removed_mock.assert_called_once_with("other-id")
+
+
+@pytest.mark.asyncio
+async def test_owned_games_mirror_failure_keeps_games(
+    installed_twitch_plugin
+    , owned_games_db
+    , get_local_games_mock
+    , mocker
+):
+    game_removed_mock = mocker.patch("twitch_plugin.TwitchPlugin.remove_game")
+    installed_twitch_plugin.handshake_complete()
+
+    mocker.patch.object(installed_twitch_plugin._owned_games_mirror, "refresh", side_effect=OperationalError)
+    mocker.patch("twitch_plugin.DbChangeTracker.has_changed", return_value=True)
+    installed_twitch_plugin.tick()
+    await installed_twitch_plugin._refresh_task
+
+    assert len(await installed_twitch_plugin.get_owned_games()) == 2
+    game_removed_mock.assert_not_called()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error, owned_games", [
+    (OperationalError("database is locked"), [_owned_game(_GAME_ID, _GAME_TITLE)])
+    , (RuntimeError, [_owned_game(_GAME_ID, _GAME_TITLE)])
+    , (FileNotFoundError, [])
+])
+async def test_failed_read(error, owned_games, installed_twitch_plugin, db_iter_mock, get_local_games_mock, mocker):
+    db_iter_mock.return_value = [_db_owned_game(_GAME_ID, _GAME_TITLE)]
+    installed_twitch_plugin.handshake_complete()
+
+    game_removed_mock = mocker.patch("twitch_plugin.TwitchPlugin.remove_game")
+    db_iter_mock.side_effect = error
+    installed_twitch_plugin.tick()
+    await installed_twitch_plugin._refresh_task
+
+    assert await installed_twitch_plugin.get_owned_games() == owned_games
+    assert game_removed_mock.call_count == 1 - len(owned_games)
+
+
+@pytest.mark.asyncio
+async def test_missing_db_probed_with_backoff(installed_twitch_plugin, db_iter_mock, get_local_games_mock, mocker):
+    clock = mocker.Mock(return_value=100.0)
+    installed_twitch_plugin._missing_dbs._clock = clock
+    db_iter_mock.side_effect = FileNotFoundError
+    warning_mock = mocker.patch("logging.warning")
+    installed_twitch_plugin.handshake_complete()
+
+    for _ in range(3):
+        installed_twitch_plugin._owned_games_refresh_requested = True
+        installed_twitch_plugin._start_refresh()
+        await installed_twitch_plugin._refresh_task
+    assert db_iter_mock.call_count == 1
+    warning_mock.assert_called_once()
+
+    clock.return_value += 5.0
+    db_iter_mock.side_effect = None
+    db_iter_mock.return_value = [_db_owned_game(_GAME_ID, _GAME_TITLE)]
+    installed_twitch_plugin._owned_games_refresh_requested = True
+    installed_twitch_plugin._start_refresh()
+    await installed_twitch_plugin._refresh_task
+
+    assert db_iter_mock.call_count == 2
+    assert await installed_twitch_plugin.get_owned_games() == [_owned_game(_GAME_ID, _GAME_TITLE)]
+
+
+@pytest.mark.asyncio
+async def test_appearing_db_probed_immediately(installed_twitch_plugin, db_iter_mock, get_local_games_mock):
+    db_iter_mock.side_effect = FileNotFoundError
+    installed_twitch_plugin.handshake_complete()
+
+    db_iter_mock.side_effect = None
+    db_iter_mock.return_value = [_db_owned_game(_GAME_ID, _GAME_TITLE)]
+    installed_twitch_plugin._on_db_changed({"owned_games"})
+    await installed_twitch_plugin._refresh_task
+
+    assert await installed_twitch_plugin.get_owned_games() == [_owned_game(_GAME_ID, _GAME_TITLE)]
+
+
+@pytest.mark.asyncio
+async def test_owned_games_mirror_recreated_db(
+    installed_twitch_plugin
+    , owned_games_db
+    , get_local_games_mock
+    , tmp_path
+    , mocker
+):
+    mocker.patch("os.path.exists", side_effect=lambda path: os.access(path, os.F_OK))
+    installed_twitch_plugin.handshake_complete()
+    os.replace(owned_games_db, tmp_path / "moved.sqlite")
+
+    installed_twitch_plugin._on_db_changed({"owned_games"})
+    await installed_twitch_plugin._refresh_task
+    assert await installed_twitch_plugin.get_owned_games() == []
+
+    os.replace(tmp_path / "moved.sqlite", owned_games_db)
+    installed_twitch_plugin._on_db_changed({"owned_games"})
+    await installed_twitch_plugin._refresh_task
+
+    assert await installed_twitch_plugin.get_owned_games() == [
+        _owned_game(_GAME_ID, _GAME_TITLE), _owned_game("other-id", "other")
+    ]
@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+from twitch_parallel import ParallelReader
+
+
+@pytest.fixture()
+def parallel_reader():
+    reader = ParallelReader(timeout=0.1)
+
+    yield reader
+
+    reader.close()
+
+
+def test_reads_run_concurrently(parallel_reader):
+    barrier = threading.Barrier(3, timeout=1)
+
+    pending = [parallel_reader.submit(f"read-{idx}", lambda idx=idx: barrier.wait() and idx) for idx in range(3)]
+
+    assert all(parallel_reader.result(read) is not None for read in pending)
+
+
+def test_failed_read_isolated(parallel_reader):
+    def fail():
+        raise RuntimeError("db is locked")
+
+    failed = parallel_reader.submit("failed", fail)
+    succeeded = parallel_reader.submit("succeeded", lambda: 42)
+
+    assert parallel_reader.result(failed) is None
+    assert parallel_reader.result(succeeded) == 42
+
+
+def test_timed_out_read_reused(parallel_reader):
+    release = threading.Event()
+    calls = []
+
+    def read():
+        calls.append(1)
+        release.wait(timeout=1)
+        return "late"
+
+    assert parallel_reader.result(parallel_reader.submit("slow", read)) is None
+    pending = parallel_reader.submit("slow", read)
+
+    release.set()
+    assert parallel_reader.result(pending) == "late"
+    assert len(calls) == 1
+
+
+def test_late_result_of_timed_out_read_used(parallel_reader):
+    release = threading.Event()
+    calls = []
+
+    def read():
+        calls.append(1)
+        release.wait(timeout=1)
+        return len(calls)
+
+    assert parallel_reader.result(parallel_reader.submit("slow", read)) is None
+    release.set()
+    parallel_reader._running["slow"].result(timeout=1)
+
+    assert parallel_reader.result(parallel_reader.submit("slow", read)) == 1
+    assert parallel_reader.result(parallel_reader.submit("slow", read)) == 2
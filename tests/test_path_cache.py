@@ -0,0 +1,98 @@
+import os
+import threading
+
+import pytest
+
+from twitch_path_cache import PathExistenceCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture()
+def clock():
+    return _Clock()
+
+
+@pytest.fixture()
+def path_cache(clock):
+    cache = PathExistenceCache(timeout=0.2, clock=clock)
+
+    yield cache
+
+    cache.close()
+
+
+@pytest.fixture()
+def games_dir(tmp_path):
+    for name in ("game-1", "game-2"):
+        (tmp_path / name).mkdir()
+    return tmp_path
+
+
+def test_siblings_checked_with_one_scandir(path_cache, games_dir, mocker):
+    scandir_spy = mocker.spy(os, "scandir")
+    paths = [str(games_dir / name) for name in ("game-1", "game-2", "missing")]
+
+    assert path_cache.exists(paths) == dict(zip(paths, [True, True, False]))
+    scandir_spy.assert_called_once_with(str(games_dir))
+
+
+def test_negative_caching(path_cache, games_dir, clock):
+    missing = str(games_dir / "missing")
+    assert path_cache.exists([missing]) == {missing: False}
+
+    os.mkdir(missing)
+    clock.now = 10
+    assert path_cache.exists([missing]) == {missing: False}
+
+    clock.now = 31
+    assert path_cache.exists([missing]) == {missing: True}
+
+
+def test_positive_ttl(path_cache, games_dir, clock):
+    game = str(games_dir / "game-1")
+    assert path_cache.exists([game]) == {game: True}
+
+    os.rmdir(game)
+    assert path_cache.exists([game]) == {game: True}
+
+    clock.now = 11
+    assert path_cache.exists([game]) == {game: False}
+
+
+def test_stalled_volume_does_not_block(path_cache, games_dir, clock, mocker):
+    game = str(games_dir / "game-1")
+    assert path_cache.exists([game]) == {game: True}
+
+    release = threading.Event()
+    mocker.patch("os.path.exists", side_effect=lambda path: release.wait(5))
+    clock.now = 11
+
+    # the probe is stuck, last known state is served
+    assert path_cache.exists([game]) == {game: True}
+    assert path_cache.exists([game]) == {game: True}
+
+    release.set()
+
+
+def test_unlistable_parent_checks_paths(path_cache, games_dir, mocker):
+    mocker.patch("os.scandir", side_effect=PermissionError)
+    paths = [str(games_dir / name) for name in ("game-1", "game-2", "missing")]
+
+    assert path_cache.exists(paths) == dict(zip(paths, [True, True, False]))
+
+
+def test_unprobed_stalled_path_exists(path_cache, games_dir, mocker):
+    release = threading.Event()
+    mocker.patch("os.path.exists", side_effect=lambda path: release.wait(5))
+    game = str(games_dir / "game-1")
+
+    assert path_cache.exists([game]) == {game: True}
+
+    release.set()
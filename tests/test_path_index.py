@@ -0,0 +1,27 @@
+import pytest
+
+from twitch_path_index import PathPrefixIndex
+
+
+@pytest.fixture()
+def path_index():
+    return PathPrefixIndex([
+        ("C:\\Games\\Foo", "foo")
+        , ("C:\\Games\\Foo\\Bar", "foo-bar")
+        , ("x:/games/game-id/", "game-id")
+        , ("", "empty")
+    ])
+
+
+@pytest.mark.parametrize("process_path, expected", [
+    ("C:\\Games\\Foo\\foo.exe", ["foo"])
+    , ("c:/games/FOO/bin/foo.exe", ["foo"])
+    , ("C:\\Games\\FooBar\\foobar.exe", [])
+    , ("C:\\Games\\Foo\\Bar\\bar.exe", ["foo", "foo-bar"])
+    , ("x:/games/game-id/game.exe", ["game-id"])
+    , ("games/game-id/game.exe", [])
+    , ("c:/windows/neshta.exe", [])
+    , ("", [])
+])
+def test_match(path_index, process_path, expected):
+    assert path_index.match(process_path) == expected
@@ -0,0 +1,118 @@
+import json
+
+import pytest
+from galaxy.api.types import GameTime
+
+from twitch_playtime import PlaytimeTracker
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture()
+def clock():
+    return _Clock()
+
+
+@pytest.fixture()
+def log_path(tmp_path):
+    return str(tmp_path / "data" / "playtime.log")
+
+
+@pytest.fixture()
+def tracker(log_path, clock):
+    tracker = PlaytimeTracker(log_path, compact_threshold=4, clock=clock)
+
+    yield tracker
+
+    tracker.close()
+
+
+def _play(tracker, clock, game_id, seconds):
+    tracker.update([game_id])
+    clock.now += seconds
+    tracker.update([])
+
+
+def test_session(tracker, clock):
+    assert tracker.game_time("game-1") == GameTime("game-1", 0, None)
+
+    tracker.update(["game-1"])
+    clock.now += 90
+    assert tracker.game_time("game-1") == GameTime("game-1", 1, 1090)
+
+    tracker.update([])
+    clock.now += 600
+    assert tracker.game_time("game-1") == GameTime("game-1", 1, 1090)
+
+
+def test_sessions_accumulate(tracker, clock):
+    _play(tracker, clock, "game-1", 120)
+    _play(tracker, clock, "game-1", 180)
+
+    assert tracker.game_time("game-1") == GameTime("game-1", 5, 1300)
+
+
+def test_log_replayed(tracker, log_path, clock):
+    _play(tracker, clock, "game-1", 120)
+    tracker.close()
+
+    reloaded = PlaytimeTracker(log_path, clock=clock)
+    reloaded.load()
+
+    assert reloaded.game_time("game-1") == GameTime("game-1", 2, 1120)
+
+
+def test_interrupted_session_dropped(tracker, log_path, clock):
+    _play(tracker, clock, "game-1", 120)
+    tracker.update(["game-1"])
+    with open(log_path, "a") as log:
+        log.write('{"event": "stop", "game_id": "game-1", "ti')
+
+    reloaded = PlaytimeTracker(log_path, clock=clock)
+    reloaded.load()
+
+    assert reloaded.game_time("game-1") == GameTime("game-1", 2, 1120)
+
+
+def test_compaction(tracker, log_path, clock):
+    for _ in range(3):
+        _play(tracker, clock, "game-1", 60)
+    tracker.update(["game-1"])
+    assert tracker.needs_compaction
+
+    tracker.compact()
+    clock.now += 60
+    tracker.update([])
+
+    assert not tracker.needs_compaction
+    with open(log_path) as log:
+        assert [json.loads(line)["event"] for line in log] == ["total", "start", "stop"]
+
+    reloaded = PlaytimeTracker(log_path, clock=clock)
+    reloaded.load()
+    assert reloaded.game_time("game-1") == GameTime("game-1", 4, 1240)
+
+
+def test_close_stops_sessions(tracker, clock):
+    tracker.update(["game-1"])
+    clock.now += 60
+    tracker.close()
+
+    clock.now += 600
+    assert tracker.game_time("game-1") == GameTime("game-1", 1, 1060)
+
+
+def test_in_memory(clock):
+    tracker = PlaytimeTracker(None, clock=clock)
+    tracker.load()
+
+    _play(tracker, clock, "game-1", 60)
+
+    assert tracker.game_time("game-1") == GameTime("game-1", 1, 1060)
+    assert not tracker.needs_compaction
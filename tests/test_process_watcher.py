@@ -0,0 +1,80 @@
+import asyncio
+import subprocess
+import sys
+
+import pytest
+
+from twitch_process_watcher import create_exit_watcher, is_linux, PollingExitWatcher
+
+_NO_SUCH_PID = 2 ** 22 + 1
+
+
+@pytest.fixture()
+def child_process():
+    process = subprocess.Popen([sys.executable, "-c", "import sys; sys.stdin.read()"], stdin=subprocess.PIPE)
+
+    yield process
+
+    process.kill()
+    process.wait()
+
+
+def _exit_child(process: subprocess.Popen) -> None:
+    process.stdin.close()
+    process.wait()
+
+
+@pytest.fixture(params=["native", "polling"])
+async def exit_watcher(request):
+    loop = asyncio.get_event_loop()
+    exits = asyncio.Queue()
+    if request.param == "polling":
+        watcher = PollingExitWatcher(exits.put_nowait, loop, interval=0.05)
+    else:
+        if not is_linux():
+            pytest.skip("native exit watcher is tested on linux only")
+        watcher = create_exit_watcher(exits.put_nowait, loop)
+    watcher.exits = exits
+
+    yield watcher
+
+    watcher.close()
+
+
+@pytest.mark.asyncio
+async def test_exit_reported(exit_watcher, child_process):
+    exit_watcher.watch([child_process.pid])
+    await asyncio.sleep(0.1)
+    assert exit_watcher.exits.empty()
+
+    _exit_child(child_process)
+
+    assert await asyncio.wait_for(exit_watcher.exits.get(), timeout=5) == child_process.pid
+
+
+@pytest.mark.asyncio
+async def test_unwatched_exit_not_reported(exit_watcher, child_process):
+    exit_watcher.watch([child_process.pid])
+    exit_watcher.watch([])
+
+    _exit_child(child_process)
+
+    await asyncio.sleep(0.2)
+    assert exit_watcher.exits.empty()
+
+
+@pytest.mark.asyncio
+async def test_missing_process_not_watched(exit_watcher):
+    exit_watcher.watch([_NO_SUCH_PID])
+
+    await asyncio.sleep(0.2)
+    assert exit_watcher.exits.empty()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not is_linux(), reason="pidfd is linux only")
+async def test_native_watcher_used():
+    watcher = create_exit_watcher(lambda pid: None, asyncio.get_event_loop())
+
+    assert not isinstance(watcher, PollingExitWatcher)
+    watcher.close()
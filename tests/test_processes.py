@@ -0,0 +1,112 @@
+import pytest
+from galaxy.proc_tools import ProcessId, ProcessInfo
+
+from twitch_processes import ProcessDelta, ProcessSnapshot
+
+_GAME = ProcessInfo(ProcessId(13), "x:/games/game-id/game.exe")
+_AGENT = ProcessInfo(ProcessId(42), "c:/twitch/TwitchAgent.exe")
+
+
+@pytest.fixture()
+def create_time_mock(mocker):
+    return mocker.patch("twitch_processes.process_create_time", return_value=1.0)
+
+
+@pytest.fixture()
+def get_process_info_mock(mocker):
+    return mocker.patch("twitch_processes.get_process_info")
+
+
+@pytest.fixture()
+def pids_mock(mocker):
+    return mocker.patch("twitch_processes.pids")
+
+
+def test_started_and_exited(pids_mock, get_process_info_mock, create_time_mock):
+    snapshot = ProcessSnapshot()
+
+    pids_mock.return_value = [_GAME.pid]
+    get_process_info_mock.return_value = _GAME
+    assert snapshot.update() == ProcessDelta(started=[_GAME], exited=[])
+
+    pids_mock.return_value = [_GAME.pid, _AGENT.pid]
+    get_process_info_mock.return_value = _AGENT
+    assert snapshot.update() == ProcessDelta(started=[_AGENT], exited=[])
+
+    pids_mock.return_value = [_AGENT.pid]
+    assert snapshot.update() == ProcessDelta(started=[], exited=[_GAME])
+    assert list(snapshot.processes) == [_AGENT]
+
+
+def test_known_processes_not_resolved(pids_mock, get_process_info_mock, create_time_mock):
+    snapshot = ProcessSnapshot()
+    pids_mock.return_value = [_GAME.pid]
+    get_process_info_mock.return_value = _GAME
+
+    snapshot.update()
+    assert snapshot.update() == ProcessDelta(started=[], exited=[])
+
+    get_process_info_mock.assert_called_once_with(_GAME.pid)
+
+
+def test_pid_reuse(pids_mock, get_process_info_mock, create_time_mock):
+    snapshot = ProcessSnapshot()
+    reused = ProcessInfo(_GAME.pid, "c:/windows/neshta.exe")
+    pids_mock.return_value = [_GAME.pid]
+    get_process_info_mock.return_value = _GAME
+    snapshot.update()
+
+    create_time_mock.return_value = 2.0
+    get_process_info_mock.return_value = reused
+
+    assert snapshot.update() == ProcessDelta(started=[reused], exited=[_GAME])
+
+
+def test_indexed_lookups(pids_mock, get_process_info_mock, create_time_mock):
+    snapshot = ProcessSnapshot()
+    pids_mock.return_value = [_GAME.pid, _AGENT.pid]
+    get_process_info_mock.side_effect = {_GAME.pid: _GAME, _AGENT.pid: _AGENT}.get
+    snapshot.update()
+
+    assert snapshot.is_running("twitchagent.exe")
+    assert snapshot.find_by_name("TwitchAgent.exe") == [_AGENT]
+    assert snapshot.find_by_path("X:\\Games\\game-id\\game.exe") == [_GAME]
+
+    pids_mock.return_value = [_GAME.pid]
+    snapshot.update()
+
+    assert not snapshot.is_running("TwitchAgent.exe")
+    assert snapshot.find_by_path("c:/twitch/TwitchAgent.exe") == []
+
+
+def test_max_age(pids_mock, get_process_info_mock, create_time_mock):
+    now = [0.0]
+    snapshot = ProcessSnapshot(clock=lambda: now[0])
+    pids_mock.return_value = [_GAME.pid]
+    get_process_info_mock.return_value = _GAME
+
+    snapshot.update(max_age=1.0)
+    snapshot.update(max_age=1.0)
+    assert pids_mock.call_count == 1
+
+    now[0] += 1.0
+    snapshot.update(max_age=1.0)
+    assert pids_mock.call_count == 2
+
+
+def test_subscribers_see_every_change(pids_mock, get_process_info_mock, create_time_mock):
+    snapshot = ProcessSnapshot()
+    first, second = snapshot.subscribe(), snapshot.subscribe()
+    get_process_info_mock.side_effect = {_GAME.pid: _GAME, _AGENT.pid: _AGENT}.get
+
+    pids_mock.return_value = [_GAME.pid]
+    snapshot.update()
+    assert first.take() == ProcessDelta(started=[_GAME], exited=[])
+
+    pids_mock.return_value = [_AGENT.pid]
+    snapshot.update()
+    pids_mock.return_value = []
+    snapshot.update()
+
+    assert first.take() == ProcessDelta(started=[], exited=[_GAME])
+    assert second.take() == ProcessDelta(started=[], exited=[])
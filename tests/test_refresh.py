@@ -0,0 +1,119 @@
+import asyncio
+import threading
+
+import pytest
+
+
+@pytest.fixture()
+def refresh_games_mock(installed_twitch_plugin, mocker):
+    return mocker.patch.object(installed_twitch_plugin, "_refresh_games", return_value=({}, {}))
+
+
+@pytest.mark.asyncio
+async def test_refresh_runs_off_loop(installed_twitch_plugin, refresh_games_mock):
+    threads = []
+    refresh_games_mock.side_effect = lambda *_: threads.append(threading.current_thread()) or ({}, {})
+
+    installed_twitch_plugin.tick()
+    await installed_twitch_plugin._refresh_task
+
+    assert threads and threading.current_thread() not in threads
+
+
+@pytest.mark.asyncio
+async def test_ticks_coalesced(installed_twitch_plugin, refresh_games_mock):
+    started = threading.Event()
+    release = threading.Event()
+
+    def refresh_games(*_):
+        started.set()
+        release.wait(timeout=5)
+        return {}, {}
+
+    refresh_games_mock.side_effect = refresh_games
+
+    installed_twitch_plugin.tick()
+    first_refresh = installed_twitch_plugin._refresh_task
+    await asyncio.get_event_loop().run_in_executor(None, started.wait, 5)
+
+    for _ in range(5):
+        installed_twitch_plugin.tick()
+        assert installed_twitch_plugin._refresh_task is first_refresh
+
+    # loop keeps serving requests while the refresh is stalled
+    assert await installed_twitch_plugin.get_owned_games() == []
+
+    release.set()
+    await first_refresh
+
+    assert refresh_games_mock.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_refresh_not_due(installed_twitch_plugin, refresh_games_mock, mocker):
+    mocker.patch("twitch_scheduler.Cadence.due", return_value=False)
+
+    installed_twitch_plugin.tick()
+
+    assert installed_twitch_plugin._refresh_task is None
+    refresh_games_mock.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_refresh_only_due_games(installed_twitch_plugin, refresh_games_mock, mocker):
+    mocker.patch.object(installed_twitch_plugin._refresh_schedule.owned_games, "due", return_value=False)
+
+    installed_twitch_plugin.tick()
+    await installed_twitch_plugin._refresh_task
+
+    refresh_games_mock.assert_called_once_with(False, True)
+
+
+@pytest.mark.asyncio
+async def test_db_change_refreshes_affected_games(installed_twitch_plugin, refresh_games_mock):
+    installed_twitch_plugin._on_db_changed({"owned_games"})
+    await installed_twitch_plugin._refresh_task
+
+    refresh_games_mock.assert_called_once_with(True, False)
+
+
+@pytest.mark.asyncio
+async def test_refresh_reads_inputs_concurrently(installed_twitch_plugin, mocker):
+    barrier = threading.Barrier(3, timeout=5)
+    mocker.patch.object(installed_twitch_plugin, "_get_owned_games", side_effect=lambda: (barrier.wait(), {})[1])
+    mocker.patch.object(installed_twitch_plugin, "_get_installed_games", side_effect=lambda: (barrier.wait(), {})[1])
+    mocker.patch.object(installed_twitch_plugin, "_scan_processes", side_effect=lambda: barrier.wait())
+
+    assert installed_twitch_plugin._refresh_games(True, True) == ({}, {})
+
+
+@pytest.mark.asyncio
+async def test_refresh_isolates_failed_input(installed_twitch_plugin, mocker):
+    mocker.patch.object(installed_twitch_plugin, "_get_owned_games", side_effect=RuntimeError)
+    mocker.patch.object(installed_twitch_plugin, "_get_installed_games", return_value={})
+    mocker.patch.object(installed_twitch_plugin, "_scan_processes")
+
+    assert installed_twitch_plugin._refresh_games(True, True) == (None, {})
+
+
+@pytest.mark.asyncio
+async def test_timed_out_owned_games_read_not_lost(installed_twitch_plugin, mocker):
+    installed_twitch_plugin._parallel_reader._timeout = 0.05
+    release = threading.Event()
+    owned_games = {"game-id": mocker.sentinel.game}
+
+    def read_owned_games():
+        if not release.is_set():
+            release.wait(timeout=1)
+            return owned_games
+        # the change tracker already saw the db change, so a new read only serves the cache
+        return installed_twitch_plugin._owned_games_cache
+
+    mocker.patch.object(installed_twitch_plugin, "_get_owned_games", side_effect=read_owned_games)
+    mocker.patch.object(installed_twitch_plugin, "_get_local_games", return_value={})
+
+    assert installed_twitch_plugin._refresh_games(True, False) == (None, None)
+    release.set()
+    installed_twitch_plugin._parallel_reader._running["owned_games"].result(timeout=1)
+
+    assert installed_twitch_plugin._refresh_games(True, False) == (owned_games, None)
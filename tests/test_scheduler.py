@@ -0,0 +1,64 @@
+import pytest
+
+from twitch_scheduler import Cadence, RefreshSchedule
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture()
+def clock():
+    return _Clock()
+
+
+@pytest.fixture()
+def cadence(clock):
+    return Cadence(min_interval=1, max_interval=8, fast_interval=1, clock=clock)
+
+
+def test_due_initially(cadence):
+    assert cadence.due()
+
+
+def test_backoff_while_stable(cadence, clock):
+    intervals = []
+    for _ in range(5):
+        cadence.completed(changed=False)
+        intervals.append(cadence.interval)
+
+    assert intervals == [2, 4, 8, 8, 8]
+
+    clock.now = 7.9
+    assert not cadence.due()
+    clock.now = 8
+    assert cadence.due()
+
+
+def test_reset_on_change(cadence):
+    for _ in range(3):
+        cadence.completed(changed=False)
+
+    cadence.completed(changed=True)
+
+    assert cadence.interval == 1
+
+
+def test_boost(clock):
+    schedule = RefreshSchedule(clock=clock)
+    for _ in range(5):
+        schedule.completed(schedule.owned_games, changed=False)
+    assert schedule.owned_games.interval == 60
+
+    schedule.boost()
+
+    assert schedule.owned_games.interval == 1
+    clock.now = 1
+    assert schedule.owned_games.due()
+
+    clock.now = 61
+    assert schedule.owned_games.interval == 60
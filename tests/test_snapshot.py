@@ -0,0 +1,110 @@
+import json
+
+import pytest
+from galaxy.api.consts import LicenseType, LocalGameState
+from galaxy.api.types import Game, LicenseInfo, LocalGame
+
+from twitch_launcher_client import TwitchLauncherClient
+from twitch_plugin import InstalledGame
+from twitch_registry import HKEY_LOCAL_MACHINE, MemoryRegistry
+from twitch_snapshot import GamesSnapshot, load_snapshot, save_snapshot
+
+_SNAPSHOT = GamesSnapshot(
+    owned_games={"game-1": "Game 1", "game-2": "Game 2"}
+    , installed_games={"game-1": "x:/games/game-1"}
+)
+
+
+@pytest.fixture()
+def snapshot_path(tmp_path):
+    return str(tmp_path / "data" / "snapshot.json")
+
+
+def test_round_trip(snapshot_path):
+    save_snapshot(snapshot_path, _SNAPSHOT)
+
+    assert load_snapshot(snapshot_path) == _SNAPSHOT
+
+
+def test_missing(snapshot_path):
+    assert load_snapshot(snapshot_path) is None
+
+
+def test_version_mismatch(snapshot_path):
+    save_snapshot(snapshot_path, _SNAPSHOT)
+    with open(snapshot_path) as snapshot_file:
+        snapshot = json.load(snapshot_file)
+    snapshot["version"] += 1
+    with open(snapshot_path, "w") as snapshot_file:
+        json.dump(snapshot, snapshot_file)
+
+    assert load_snapshot(snapshot_path) is None
+
+
+def test_corrupted(snapshot_path):
+    save_snapshot(snapshot_path, _SNAPSHOT)
+    with open(snapshot_path, "r+") as snapshot_file:
+        snapshot_file.truncate(10)
+
+    assert load_snapshot(snapshot_path) is None
+
+
+def _owned_game(game_id, game_title):
+    return Game(game_id, game_title, None, LicenseInfo(LicenseType.SinglePurchase))
+
+
+@pytest.mark.asyncio
+async def test_warm_start(installed_twitch_plugin, snapshot_path, mocker):
+    save_snapshot(snapshot_path, _SNAPSHOT)
+    installed_twitch_plugin._snapshot_path = snapshot_path
+    get_owned_games_mock = mocker.patch.object(installed_twitch_plugin, "_get_owned_games", return_value={
+        "game-1": _owned_game("game-1", "Game 1")
+        , "game-3": _owned_game("game-3", "Game 3")
+    })
+    mocker.patch.object(installed_twitch_plugin, "_get_local_games", return_value={
+        "game-1": InstalledGame("game-1", LocalGameState.Installed, "x:/games/game-1")
+    })
+    game_added_mock = mocker.patch("twitch_plugin.TwitchPlugin.add_game")
+    game_removed_mock = mocker.patch("twitch_plugin.TwitchPlugin.remove_game")
+    local_game_status_mock = mocker.patch("twitch_plugin.TwitchPlugin.update_local_game_status")
+
+    installed_twitch_plugin.handshake_complete()
+
+    assert await installed_twitch_plugin.get_owned_games() == [
+        _owned_game("game-1", "Game 1"), _owned_game("game-2", "Game 2")
+    ]
+    assert await installed_twitch_plugin.get_local_games() == [LocalGame("game-1", LocalGameState.Installed)]
+    get_owned_games_mock.assert_not_called()
+
+    await installed_twitch_plugin._refresh_task
+
+    game_added_mock.assert_called_once_with(_owned_game("game-3", "Game 3"))
+    game_removed_mock.assert_called_once_with("game-2")
+    local_game_status_mock.assert_not_called()
+
+    installed_twitch_plugin._refresh_executor.shutdown(wait=True)
+    assert load_snapshot(snapshot_path) == GamesSnapshot(
+        owned_games={"game-1": "Game 1", "game-3": "Game 3"}
+        , installed_games={"game-1": "x:/games/game-1"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_warm_start_resolves_launcher(twitch_plugin, snapshot_path, mocker):
+    install_path = "c:/program files/twitch"
+    registry = MemoryRegistry()
+    registry.set_values(
+        HKEY_LOCAL_MACHINE
+        , f"{TwitchLauncherClient._UNINSTALL_KEY}\\Twitch"
+        , {"DisplayName": "Twitch", "InstallLocation": install_path}
+    )
+    mocker.patch("os.path.exists", side_effect=lambda path: path == install_path)
+    save_snapshot(snapshot_path, _SNAPSHOT)
+    twitch_plugin._snapshot_path = snapshot_path
+    twitch_plugin._launcher_client = TwitchLauncherClient(processes=twitch_plugin._processes, registry=registry)
+    mocker.patch.object(twitch_plugin, "_refresh_games", return_value=(None, None))
+
+    twitch_plugin.handshake_complete()
+
+    assert twitch_plugin._launcher_client._launcher_install_path == install_path
+    assert twitch_plugin._launcher_client.cookies_db_path.startswith(install_path)
@@ -0,0 +1,70 @@
+import json
+import logging
+
+import pytest
+
+from twitch_stats import Stats
+
+
+@pytest.fixture()
+def enabled_stats():
+    return Stats(dump_interval=60)
+
+
+def test_disabled_stats():
+    stats = Stats()
+
+    with stats.phase("query"):
+        stats.count("rows_read", 10)
+        stats.gauge("queue_depth", 10)
+
+    assert not stats.enabled
+    assert stats.snapshot() == {"phases": {}, "counters": {}, "gauges": {}}
+
+
+def test_phases_and_counters(enabled_stats):
+    for _ in range(3):
+        with enabled_stats.phase("query"):
+            enabled_stats.count("rows_read", 10)
+
+    with pytest.raises(ValueError):
+        with enabled_stats.phase("diff"):
+            raise ValueError
+
+    snapshot = enabled_stats.snapshot()
+    assert snapshot["counters"] == {"rows_read": 30}
+    assert snapshot["phases"]["query"]["count"] == 3
+    assert snapshot["phases"]["diff"]["count"] == 1
+    assert snapshot["phases"]["query"]["max_ms"] <= snapshot["phases"]["query"]["total_ms"]
+
+
+def test_gauges(enabled_stats):
+    for value in (3, 10, 5):
+        enabled_stats.gauge("queue_depth", value)
+
+    assert enabled_stats.snapshot()["gauges"] == {"queue_depth": {"last": 5, "max": 10}}
+
+
+def test_dump(enabled_stats, caplog):
+    enabled_stats.count("notifications_sent", 2)
+
+    with caplog.at_level(logging.INFO):
+        enabled_stats.dump()
+
+    prefix, payload = caplog.records[-1].getMessage().split(" ", 1)
+    assert prefix == "twitch-stats"
+    assert json.loads(payload)["counters"] == {"notifications_sent": 2}
+
+
+def test_maybe_dump_interval(mocker):
+    monotonic_mock = mocker.patch("time.monotonic", return_value=0)
+    enabled_stats = Stats(dump_interval=60)
+    dump_mock = mocker.patch.object(enabled_stats, "dump")
+
+    enabled_stats.maybe_dump()
+    dump_mock.assert_not_called()
+
+    monotonic_mock.return_value = 120
+    enabled_stats.maybe_dump()
+    enabled_stats.maybe_dump()
+    dump_mock.assert_called_once_with()